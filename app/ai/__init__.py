@@ -1,21 +1,66 @@
 from .llm import LLM
 from .embedding import Embedding
+from .embedding_cache import EmbeddingCache
+from .filename_index import FilenameIndex
+from .answer_cache import AnswerCache, make_scope
+from .reranker import Reranker, LexicalEmbeddingReranker, CrossEncoderReranker
 from .prompts import PromptRegistry
 from configs.env_configs import env_config
+from utils.token_counter import get_token_counter
 
 llm = LLM(
     base_url=env_config.base_url,
-    api_key=env_config.api_key
+    api_key=env_config.api_key,
+    max_connections=env_config.llm_max_connections,
+    max_keepalive_connections=env_config.llm_max_keepalive_connections,
+    timeout_seconds=env_config.llm_timeout_seconds,
+    instrument=env_config.instrumentation_enabled
 )
 
+embedding_cache = None
+if env_config.embedding_cache_max_bytes > 0:
+    embedding_cache = EmbeddingCache(
+        max_bytes=env_config.embedding_cache_max_bytes,
+        persist_path=env_config.embedding_cache_path
+    )
+
 embedding_model = Embedding(
     url=env_config.embedding_url,
     api_key=env_config.api_key,
-    model_name=env_config.embedding_model
+    model_name=env_config.embedding_model,
+    batch_size=env_config.embedding_batch_size,
+    max_connections=env_config.embedding_max_connections,
+    cache=embedding_cache
 )
 
+filename_index = FilenameIndex(embedding=embedding_model)
+
+if env_config.reranker == "cross_encoder":
+    if not env_config.reranker_model_path or not env_config.reranker_tokenizer_path:
+        raise ValueError("RERANKER=cross_encoder requires RERANKER_MODEL_PATH and RERANKER_TOKENIZER_PATH")
+    reranker = CrossEncoderReranker(
+        model_path=env_config.reranker_model_path,
+        tokenizer_path=env_config.reranker_tokenizer_path,
+        batch_size=env_config.reranker_batch_size
+    )
+else:
+    reranker = LexicalEmbeddingReranker(embedding=embedding_model, bm25_weight=env_config.rerank_bm25_weight)
+
+answer_cache = None
+if env_config.answer_cache_max_bytes > 0:
+    answer_cache = AnswerCache(
+        embedding=embedding_model,
+        max_bytes=env_config.answer_cache_max_bytes,
+        max_entries=env_config.answer_cache_max_entries,
+        ttl_seconds=env_config.answer_cache_ttl_seconds,
+        similarity_threshold=env_config.answer_cache_similarity_threshold
+    )
+
 prompt_registry = PromptRegistry(source=env_config.prompts_path)
 
+# tiktoken may download its encoding file: do it now rather than on the event loop in the generation node
+token_counter = get_token_counter(env_config.context_tokenizer_encoding)
+
 def get_llm() -> LLM:
     """Dependency provider for FastAPI."""
     return llm
@@ -24,6 +69,18 @@ def get_embedding() -> Embedding:
     """Dependency provider for FastAPI."""
     return embedding_model
 
+def get_filename_index() -> FilenameIndex:
+    """Dependency provider for FastAPI."""
+    return filename_index
+
+def get_reranker() -> Reranker:
+    """Dependency provider for FastAPI."""
+    return reranker
+
+def get_answer_cache() -> AnswerCache | None:
+    """Dependency provider for FastAPI."""
+    return answer_cache
+
 def get_prompt_registry() -> PromptRegistry:
     """Dependency provider for FastAPI."""
     return prompt_registry
\ No newline at end of file
@@ -0,0 +1,107 @@
+import numpy as np
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ai.embedding import Embedding
+from ai.embedding_cache import normalize_text
+from utils.lru_cache import LRUCache
+
+Scope = Tuple[Tuple[str, Hashable], ...]
+
+def make_scope(**fields : Hashable) -> Scope:
+    """Build a hashable cache scope from named request fields."""
+    return tuple(sorted(fields.items()))
+
+class AnswerCache:
+
+    """
+    Final answers of the agentic RAG graph keyed by (scope, normalized question)
+    - The scope carries the target collections, request flags and collection versions,
+      so a changed collection naturally stops matching its old answers
+    - LRU bounded by answer bytes and entry count, with a TTL
+    - Optional semantic lookup: a miss falls back to the most similar cached question
+      of the same scope when the cosine similarity reaches `similarity_threshold` (0 disables it)
+    """
+
+    def __init__(
+        self,
+        embedding : Embedding,
+        max_bytes : int,
+        max_entries : Optional[int] = None,
+        ttl_seconds : Optional[float] = None,
+        similarity_threshold : float = 0.0
+    ):
+        self.embedding = embedding
+        self.similarity_threshold = similarity_threshold
+        self.cache = LRUCache(
+            max_bytes=max_bytes,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            sizeof=lambda answer: len(answer.encode("utf-8"))
+        )
+        self.semantic_hits = 0
+        self._vectors : Dict[Scope, Dict[str, np.ndarray]] = {}
+        self._lock = Lock()
+
+    async def aget(self, scope : Scope, question : str) -> Optional[str]:
+        question = normalize_text(question)
+
+        answer = self.cache.get((scope, question))
+        if answer is not None or self.similarity_threshold <= 0:
+            return answer
+
+        with self._lock:
+            candidates = dict(self._vectors.get(scope, {}))
+        if not candidates:
+            return None
+
+        questions = list(candidates.keys())
+        scores = np.stack([candidates[q] for q in questions]) @ await self._aembed(question)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        answer = self.cache.get((scope, questions[best]))
+        if answer is not None:
+            self.semantic_hits += 1
+        return answer
+
+    async def aset(self, scope : Scope, question : str, answer : str) -> None:
+        question = normalize_text(question)
+        self.cache.set((scope, question), answer)
+
+        if self.similarity_threshold <= 0:
+            return
+
+        vector = await self._aembed(question)
+        with self._lock:
+            self._vectors.setdefault(scope, {})[question] = vector
+            self._prune()
+
+    def invalidate(self, **fields : Hashable) -> int:
+        """Drop every answer whose scope matches all of `fields`. Returns the number of dropped answers."""
+        def matches(key : Tuple[Scope, str]) -> bool:
+            scope = dict(key[0])
+            return all(scope.get(name) == value for name, value in fields.items())
+
+        removed = self.cache.pop_where(matches)
+        with self._lock:
+            self._prune()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "semantic_hits": self.semantic_hits}
+
+    async def _aembed(self, question : str) -> np.ndarray:
+        vector = np.asarray(await self.embedding.aget_embeddings(question), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        return vector
+
+    def _prune(self) -> None:
+        # Forget vectors of evicted or expired answers
+        for scope in list(self._vectors):
+            questions = self._vectors[scope]
+            for question in [q for q in questions if (scope, q) not in self.cache]:
+                del questions[question]
+            if not questions:
+                del self._vectors[scope]
@@ -1,32 +1,139 @@
+import asyncio
 import requests
+import httpx
 import json
-from typing import List
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Tuple
 
+from ai.embedding_cache import EmbeddingCache, normalize_text
 from utils.logger import logger
 
 MAX_TIMEOUT_SECONDS = 120
 
 class Embedding:
 
-    def __init__(self, url : str, api_key : str, model_name : str):
+    """
+    OpenAI-compatible embedding client
+    - Single text and batched (`input` list) requests
+    - Pooled HTTP sessions for sync and async callers
+    - Optional EmbeddingCache consulted before calling the server
+    """
+
+    def __init__(
+        self,
+        url : str,
+        api_key : str,
+        model_name : str,
+        batch_size : int = 64,
+        max_connections : int = 20,
+        cache : Optional[EmbeddingCache] = None
+    ):
         self.url = url
         self.api_key = api_key
         self.model_name = model_name
-    
-    def get_embeddings(self, text : str) -> List[float]:
+        self.batch_size = batch_size
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.async_client = httpx.AsyncClient(
+            timeout=MAX_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
 
-        headers = {
+    def _get_headers(self) -> dict:
+        return {
             "Authorization" : f"Bearer {self.api_key}",
             "Content-Type" : "application/json"
         }
 
-        payload = {
+    def _get_payload(self, text : str | List[str]) -> dict:
+        return {
             "model" : self.model_name,
             "input" : text,
         }
 
+    def _get_batches(self, texts : List[str]) -> List[List[str]]:
+        return [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+
+    @staticmethod
+    def _parse_batch_response(response_json : Dict[str, Any], expected : int) -> List[List[float]]:
+        if "error" in response_json:
+            logger.info(response_json)
+
+        data = sorted(response_json["data"], key=lambda item: item.get("index", 0))
+        if len(data) != expected:
+            raise ValueError(f"Embedding server returned {len(data)} embeddings for {expected} inputs")
+        return [item["embedding"] for item in data]
+    
+    def _split_cached(self, texts : List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        """Return cached vectors and the deduplicated texts that still need embedding."""
+        cached = self.cache.get_many(self.model_name, texts)
+        missing = {}
+        for text in texts:
+            key = normalize_text(text)
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return cached, list(missing.values())
+
+    def _merge_cached(self, texts : List[str], cached : Dict[str, List[float]], missing : List[str], vectors : List[List[float]]) -> List[List[float]]:
+        fetched = dict(zip(missing, vectors))
+        if fetched:
+            self.cache.set_many(self.model_name, fetched)
+            cached.update({normalize_text(text): vector for text, vector in fetched.items()})
+        return [cached[normalize_text(text)] for text in texts]
+
+    async def _arun_cache(self, method, *args):
+        """Cache lookups / stores hitting SQLite run in a worker thread, memory-only ones stay on the loop."""
+        if self.cache.persistent:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def get_embeddings(self, text : str) -> List[float]:
+
+        if self.cache is not None:
+            return self.get_embeddings_batch([text])[0]
+
+        try:
+            response = self.session.post(url=self.url, headers=self._get_headers(), data=json.dumps(self._get_payload(text)), timeout=MAX_TIMEOUT_SECONDS)
+            response.raise_for_status()
+
+            if "error" in response.json():
+                logger.info(response.json())
+
+            return response.json()["data"][0]["embedding"]
+        except Exception as e:
+            raise e
+
+    def get_embeddings_batch(self, texts : List[str]) -> List[List[float]]:
+        """Embed many texts, one request per `batch_size` inputs. Output order matches `texts`."""
+
+        if self.cache is None:
+            return self._request_embeddings_batch(texts)
+
+        cached, missing = self._split_cached(texts)
+        vectors = self._request_embeddings_batch(missing) if missing else []
+        return self._merge_cached(texts, cached, missing, vectors)
+
+    def _request_embeddings_batch(self, texts : List[str]) -> List[List[float]]:
+
+        embeddings = []
+        for batch in self._get_batches(texts):
+            response = self.session.post(url=self.url, headers=self._get_headers(), data=json.dumps(self._get_payload(batch)), timeout=MAX_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            embeddings.extend(self._parse_batch_response(response.json(), len(batch)))
+        return embeddings
+
+    async def aget_embeddings(self, text : str) -> List[float]:
+
+        if self.cache is not None:
+            return (await self.aget_embeddings_batch([text]))[0]
+
         try:
-            response = requests.post(url=self.url, headers=headers, data=json.dumps(payload), timeout=MAX_TIMEOUT_SECONDS)
+            response = await self.async_client.post(url=self.url, headers=self._get_headers(), content=json.dumps(self._get_payload(text)))
             response.raise_for_status()
 
             if "error" in response.json():
@@ -34,4 +141,24 @@ class Embedding:
 
             return response.json()["data"][0]["embedding"]
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    async def aget_embeddings_batch(self, texts : List[str]) -> List[List[float]]:
+        """Async variant of `get_embeddings_batch`; batches are sent concurrently."""
+
+        if self.cache is None:
+            return await self._arequest_embeddings_batch(texts)
+
+        cached, missing = await self._arun_cache(self._split_cached, texts)
+        vectors = await self._arequest_embeddings_batch(missing) if missing else []
+        return await self._arun_cache(self._merge_cached, texts, cached, missing, vectors)
+
+    async def _arequest_embeddings_batch(self, texts : List[str]) -> List[List[float]]:
+
+        async def embed_batch(batch : List[str]) -> List[List[float]]:
+            response = await self.async_client.post(url=self.url, headers=self._get_headers(), content=json.dumps(self._get_payload(batch)))
+            response.raise_for_status()
+            return self._parse_batch_response(response.json(), len(batch))
+
+        results = await asyncio.gather(*(embed_batch(batch) for batch in self._get_batches(texts)))
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
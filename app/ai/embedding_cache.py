@@ -0,0 +1,126 @@
+import re
+import sqlite3
+import sys
+import unicodedata
+from array import array
+from threading import Lock
+from typing import Dict, List, Optional
+
+from utils.lru_cache import LRUCache
+from utils.logger import logger
+
+VECTOR_OVERHEAD_BYTES = 64
+SQLITE_MAX_PARAMS = 500
+
+PERSIAN_CHAR_MAP = str.maketrans({
+    "ي": "ی",
+    "ى": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "\u200c": " ",
+})
+
+def entry_size(key : str, vector : array) -> int:
+    """Memory held by one cached embedding: the vector, its text key and a fixed overhead."""
+    return vector.itemsize * len(vector) + sys.getsizeof(key) + VECTOR_OVERHEAD_BYTES
+
+def normalize_text(text : str) -> str:
+    """Normalize text for cache keys: NFKC, Arabic to Persian letters, collapsed whitespace."""
+    text = unicodedata.normalize("NFKC", text).translate(PERSIAN_CHAR_MAP)
+    return re.sub(r"\s+", " ", text).strip()
+
+class EmbeddingCache:
+
+    """
+    Embedding cache keyed on (model_name, normalized text)
+    - In-memory LRU bounded by a byte budget (vectors and their text keys)
+    - Optional SQLite file backing the memory layer across restarts; its reads and writes block,
+      so async callers run them in a worker thread (see `persistent`)
+    - Hit / miss counters for both layers
+    """
+
+    def __init__(self, max_bytes : int, persist_path : Optional[str] = None):
+        self.memory = LRUCache(max_bytes=max_bytes)
+        self.persist_path = persist_path
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._connection : Optional[sqlite3.Connection] = None
+
+        if persist_path:
+            self._connection = sqlite3.connect(persist_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text))"
+            )
+            self._connection.commit()
+            logger.info(f"Embedding cache persisted at {persist_path}")
+
+    @property
+    def persistent(self) -> bool:
+        return self._connection is not None
+
+    def get_many(self, model_name : str, texts : List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for `texts`, keyed by the normalized text."""
+        found = {}
+        missing = []
+
+        for key in {normalize_text(text) for text in texts}:
+            vector = self.memory.get((model_name, key))
+            if vector is None:
+                missing.append(key)
+            else:
+                found[key] = vector.tolist()
+
+        if missing and self._connection is not None:
+            for key, vector in self._load(model_name, missing).items():
+                self.memory.set((model_name, key), vector, size=entry_size(key, vector))
+                found[key] = vector.tolist()
+                self.disk_hits += 1
+
+        self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def set_many(self, model_name : str, vectors : Dict[str, List[float]]) -> None:
+        """Store vectors keyed by normalized text."""
+        packed = {normalize_text(text): array("f", vector) for text, vector in vectors.items()}
+
+        for key, vector in packed.items():
+            self.memory.set((model_name, key), vector, size=entry_size(key, vector))
+
+        if self._connection is not None:
+            rows = [(model_name, key, vector.tobytes()) for key, vector in packed.items()]
+            with self._lock:
+                self._connection.executemany("INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)", rows)
+                self._connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        memory_stats = self.memory.stats()
+        return {
+            "entries": memory_stats["entries"],
+            "bytes": memory_stats["bytes"],
+            "memory_hits": memory_stats["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": memory_stats["evictions"],
+        }
+
+    def _load(self, model_name : str, keys : List[str]) -> Dict[str, array]:
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                chunk = keys[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" for _ in chunk)
+                rows.extend(self._connection.execute(
+                    f"SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({placeholders})",
+                    [model_name, *chunk]
+                ).fetchall())
+
+        loaded = {}
+        for key, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            loaded[key] = vector
+        return loaded
@@ -0,0 +1,59 @@
+import os
+import re
+import numpy as np
+from threading import Lock
+from typing import Dict, Hashable, List, Tuple
+
+from ai.embedding import Embedding
+
+def filename_to_text(filename : str) -> str:
+    """Turn a filename into embeddable text: drop the extension and separators."""
+    stem = os.path.splitext(filename)[0]
+    return re.sub(r"[_\-.]+", " ", stem).strip() or filename
+
+class FilenameIndex:
+
+    """
+    Embedding index over filename catalogs
+    - One normalized vector matrix per catalog key, rebuilt when the catalog version changes
+    - Filename vectors go through the Embedding client, so its cache absorbs rebuilds
+    - `ashortlist` ranks catalog ids by cosine similarity to a question
+    """
+
+    def __init__(self, embedding : Embedding):
+        self.embedding = embedding
+        self._indices : Dict[Hashable, Tuple[int, List[str], np.ndarray]] = {}
+        self._lock = Lock()
+
+    async def ashortlist(self, key : Hashable, version : int, filenames : Dict[str, str], question : str, top_n : int) -> List[Tuple[str, float]]:
+        """Return up to `top_n` (catalog id, similarity) pairs, best first. `version` is the FilenameCatalog version of `filenames`."""
+        if not filenames:
+            return []
+
+        file_ids, matrix = await self._aget_index(key, version, filenames)
+
+        question_vector = np.asarray(await self.embedding.aget_embeddings(question), dtype=np.float32)
+        question_vector /= np.linalg.norm(question_vector) or 1.0
+
+        scores = matrix @ question_vector
+        top_n = min(top_n, len(file_ids))
+        best = np.argpartition(-scores, top_n - 1)[:top_n]
+        best = best[np.argsort(-scores[best])]
+        return [(file_ids[i], float(scores[i])) for i in best]
+
+    async def _aget_index(self, key : Hashable, version : int, filenames : Dict[str, str]) -> Tuple[List[str], np.ndarray]:
+        index = self._indices.get(key)
+        if index is not None and index[0] == version:
+            return index[1], index[2]
+
+        file_ids = list(filenames.keys())
+        vectors = await self.embedding.aget_embeddings_batch([filename_to_text(filenames[file_id]) for file_id in file_ids])
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        with self._lock:
+            self._indices[key] = (version, file_ids, matrix)
+        return file_ids, matrix
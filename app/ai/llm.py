@@ -1,21 +1,113 @@
+import httpx
+import time
+from threading import Lock
+from langchain_core.messages import AIMessage, BaseMessage
 from langchain_openai import ChatOpenAI
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.metrics import llm_request_duration_seconds, llm_time_to_first_token_seconds, llm_tokens_total
+
 class LLM:
 
-    def __init__(self, base_url : str, api_key : str):
+    """
+    Chat completion client
+    - ChatOpenAI clients are pooled per (model_name, temperature)
+    - All pooled clients share one sync and one async HTTP connection pool
+    - With `instrument`, completions are streamed so time-to-first-token can be measured,
+      and durations and token usage are recorded as metrics
+    """
+
+    def __init__(
+        self,
+        base_url : str,
+        api_key : str,
+        max_connections : int = 100,
+        max_keepalive_connections : int = 20,
+        timeout_seconds : float = 120.0,
+        instrument : bool = False
+    ):
         self.base_url = base_url
         self.api_key = api_key
+        self.timeout_seconds = timeout_seconds
+        self.instrument = instrument
 
-    def _get_client(self, model_name : str, temperature : float) -> ChatOpenAI:
-        client = ChatOpenAI(
-            temperature=temperature,
-            model_name=model_name,
-            base_url=self.base_url,
-            api_key=self.api_key
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
         )
+        self.http_client = httpx.Client(limits=limits, timeout=timeout_seconds)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout_seconds)
+
+        self._clients : Dict[Tuple[str, float], ChatOpenAI] = {}
+        self._clients_lock = Lock()
+
+    def _get_client(self, model_name : str, temperature : float) -> ChatOpenAI:
+        key = (model_name, temperature)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = ChatOpenAI(
+                    temperature=temperature,
+                    model_name=model_name,
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    timeout=self.timeout_seconds,
+                    http_client=self.http_client,
+                    http_async_client=self.http_async_client,
+                    stream_usage=self.instrument
+                )
+                self._clients[key] = client
         return client
 
     def get_completions(self, model_name: str, temperature : float, message : List[Dict[str, Any]]):
         client = self._get_client(model_name, temperature)
-        response = client.invoke(message)
-        return response
\ No newline at end of file
+        if not self.instrument:
+            return client.invoke(message)
+
+        started_at, first_token_at, response, outcome = time.perf_counter(), None, None, "error"
+        try:
+            for chunk in client.stream(message):
+                if first_token_at is None and chunk.content:
+                    first_token_at = time.perf_counter()
+                response = chunk if response is None else response + chunk
+            outcome = "ok"
+        finally:
+            self._record_metrics(model_name, started_at, first_token_at, response, outcome)
+        return response if response is not None else AIMessage(content="")
+
+    async def aget_completions(self, model_name: str, temperature : float, message : List[Dict[str, Any]]):
+        client = self._get_client(model_name, temperature)
+        if not self.instrument:
+            return await client.ainvoke(message)
+
+        started_at, first_token_at, response, outcome = time.perf_counter(), None, None, "error"
+        try:
+            async for chunk in client.astream(message):
+                if first_token_at is None and chunk.content:
+                    first_token_at = time.perf_counter()
+                response = chunk if response is None else response + chunk
+            outcome = "ok"
+        finally:
+            self._record_metrics(model_name, started_at, first_token_at, response, outcome)
+        return response if response is not None else AIMessage(content="")
+
+    def _record_metrics(
+        self,
+        model_name : str,
+        started_at : float,
+        first_token_at : Optional[float],
+        response : Optional[BaseMessage],
+        outcome : str
+    ) -> None:
+        llm_request_duration_seconds.observe(time.perf_counter() - started_at, model=model_name, outcome=outcome)
+        if first_token_at is not None:
+            llm_time_to_first_token_seconds.observe(first_token_at - started_at, model=model_name)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            llm_tokens_total.inc(usage.get("input_tokens", 0), model=model_name, kind="prompt")
+            llm_tokens_total.inc(usage.get("output_tokens", 0), model=model_name, kind="completion")
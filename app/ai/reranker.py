@@ -0,0 +1,123 @@
+import asyncio
+import math
+import re
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import List, Optional
+
+from ai.embedding import Embedding
+from ai.embedding_cache import normalize_text
+
+def tokenize(text : str) -> List[str]:
+    return re.findall(r"\w+", normalize_text(text).lower())
+
+def min_max_normalize(scores : np.ndarray) -> np.ndarray:
+    spread = scores.max() - scores.min() if len(scores) else 0.0
+    if spread == 0:
+        return np.zeros_like(scores)
+    return (scores - scores.min()) / spread
+
+def bm25_scores(query : str, texts : List[str], k1 : float = 1.5, b : float = 0.75) -> np.ndarray:
+    """BM25 of `query` against `texts`, with the candidate set itself as the corpus."""
+    documents = [tokenize(text) for text in texts]
+    lengths = np.array([len(tokens) for tokens in documents], dtype=np.float32)
+    avg_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+
+    document_frequency = Counter(token for tokens in documents for token in set(tokens))
+    query_tokens = set(tokenize(query))
+
+    scores = np.zeros(len(documents), dtype=np.float32)
+    for i, tokens in enumerate(documents):
+        frequencies = Counter(tokens)
+        for token in query_tokens:
+            frequency = frequencies.get(token, 0)
+            if frequency == 0:
+                continue
+            df = document_frequency[token]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            scores[i] += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * lengths[i] / avg_length))
+    return scores
+
+class Reranker(ABC):
+
+    """
+    Base reranker
+    - `ascore` scores candidate texts against a question in one batch (higher is better)
+    """
+
+    @abstractmethod
+    async def ascore(self, question : str, texts : List[str]) -> List[float]:
+        ...
+
+class LexicalEmbeddingReranker(Reranker):
+
+    """
+    CPU-only reranker mixing lexical and semantic relevance
+    - BM25 over the candidate set, min-max normalized
+    - Cosine similarity between question and chunk embeddings, through the cached Embedding client
+    - Final score: bm25_weight * bm25 + (1 - bm25_weight) * cosine
+    """
+
+    def __init__(self, embedding : Embedding, bm25_weight : float = 0.3):
+        self.embedding = embedding
+        self.bm25_weight = bm25_weight
+
+    async def ascore(self, question : str, texts : List[str]) -> List[float]:
+        if not texts:
+            return []
+
+        vectors = await self.embedding.aget_embeddings_batch([question, *texts])
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        matrix /= norms[:, None]
+        cosine = matrix[1:] @ matrix[0]
+
+        lexical = min_max_normalize(bm25_scores(question, texts))
+        scores = self.bm25_weight * lexical + (1 - self.bm25_weight) * min_max_normalize(cosine)
+        return scores.tolist()
+
+class CrossEncoderReranker(Reranker):
+
+    """
+    ONNX cross-encoder reranker (e.g. an int8-quantized MiniLM / BGE reranker export)
+    - Needs the optional `onnxruntime` and `tokenizers` packages
+    - Scores (question, chunk) pairs in batches of `batch_size` on a worker thread
+    """
+
+    def __init__(self, model_path : str, tokenizer_path : str, batch_size : int = 32, max_length : int = 512, num_threads : Optional[int] = None):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("CrossEncoderReranker requires the `onnxruntime` and `tokenizers` packages") from e
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    async def ascore(self, question : str, texts : List[str]) -> List[float]:
+        if not texts:
+            return []
+        return await asyncio.to_thread(self._score, question, texts)
+
+    def _score(self, question : str, texts : List[str]) -> List[float]:
+        scores = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch([(question, text) for text in texts[start:start + self.batch_size]])
+            inputs = {
+                "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+                "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            logits = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+            scores.extend(np.asarray(logits, dtype=np.float32).reshape(len(encodings), -1)[:, 0].tolist())
+        return scores
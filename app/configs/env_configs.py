@@ -13,18 +13,58 @@ class Environment_Config:
     api_key : str
     base_url : str
     generation_model : str
+    llm_max_connections : int
+    llm_max_keepalive_connections : int
+    llm_timeout_seconds : float
     sql_generation_model : str
     embedding_url : str
     embedding_model : str
+    embedding_batch_size : int
+    embedding_max_connections : int
+    embedding_cache_max_bytes : int
+    embedding_cache_path : str | None
+    answer_cache_max_bytes : int
+    answer_cache_max_entries : int
+    answer_cache_ttl_seconds : float
+    answer_cache_similarity_threshold : float
     weaviate_host : str
     weaviate_port : int
     weaviate_grpc_port : int
     weaviate_user_key : str
     hybrid_search_alpha : float
+    retrieval_max_concurrency : int
+    retrieval_timeout_seconds : float
+    rrf_k : int
+    reranker : str
+    reranker_model_path : str | None
+    reranker_tokenizer_path : str | None
+    reranker_batch_size : int
+    rerank_top_k : int
+    rerank_bm25_weight : float
+    context_token_budget : int
+    context_max_snippet_tokens : int
+    context_tokenizer_encoding : str
+    generation_timeout_seconds : float
+    max_keyword_rewrites : int
+    batch_max_concurrency : int
+    batch_max_size : int
     mongodb_uri : str
     mongodb_initdb_dev_username : str
     mongodb_initdb_dev_password : str
+    catalog_cache_ttl_seconds : float
+    catalog_cache_refresh_seconds : float
+    filename_catalog_watch_changes : bool
+    retrieval_cache_max_bytes : int
+    retrieval_cache_max_entries : int
+    retrieval_cache_ttl_seconds : float
+    instrumentation_enabled : bool
+    filename_shortlist_size : int
+    filename_auto_select_threshold : float
     source_download_api_path_base : str
+    page_image_cache_max_bytes : int
+    page_image_cache_dir : str | None
+    page_image_cache_dir_max_bytes : int
+    page_image_max_age_seconds : int
     sql_host : str
     sql_port : int
     sql_user : str
@@ -43,18 +83,58 @@ class Environment_Config:
         api_key = os.environ.get("API_KEY")
         base_url = os.environ.get("BASE_URL")
         generation_model = os.environ.get("GENERATION_MODEL")
+        llm_max_connections = int(os.environ.get("LLM_MAX_CONNECTIONS", 100))
+        llm_max_keepalive_connections = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+        llm_timeout_seconds = float(os.environ.get("LLM_TIMEOUT_SECONDS", 120))
         sql_generation_model = os.environ.get("SQL_GENERATION_MODEL")
         embedding_url = os.environ.get("EMBEDDING_URL")
         embedding_model = os.environ.get("EMBEDDING_MODEL")
+        embedding_batch_size = int(os.environ.get("EMBEDDING_BATCH_SIZE", 64))
+        embedding_max_connections = int(os.environ.get("EMBEDDING_MAX_CONNECTIONS", 20))
+        embedding_cache_max_bytes = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        embedding_cache_path = os.environ.get("EMBEDDING_CACHE_PATH") or None
+        answer_cache_max_bytes = int(os.environ.get("ANSWER_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+        answer_cache_max_entries = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 2000))
+        answer_cache_ttl_seconds = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 600))
+        answer_cache_similarity_threshold = float(os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0))
         weaviate_host = os.environ.get("WEAVIATE_HOST")
         weaviate_port = int(os.environ.get("WEAVIATE_PORT"))
         weaviate_grpc_port = int(os.environ.get("WEAVIATE_GRPC_PORT"))
         weaviate_user_key = os.environ.get("WEAVIATE_USER_KEY")
         hybrid_search_alpha = float(os.environ.get("HYBRID_SEARCH_ALPHA"))
+        retrieval_max_concurrency = int(os.environ.get("RETRIEVAL_MAX_CONCURRENCY", 8))
+        retrieval_timeout_seconds = float(os.environ.get("RETRIEVAL_TIMEOUT_SECONDS", 30))
+        rrf_k = int(os.environ.get("RRF_K", 60))
+        reranker = os.environ.get("RERANKER", "bm25_embedding")
+        reranker_model_path = os.environ.get("RERANKER_MODEL_PATH") or None
+        reranker_tokenizer_path = os.environ.get("RERANKER_TOKENIZER_PATH") or None
+        reranker_batch_size = int(os.environ.get("RERANKER_BATCH_SIZE", 32))
+        rerank_top_k = int(os.environ.get("RERANK_TOP_K", 0))
+        rerank_bm25_weight = float(os.environ.get("RERANK_BM25_WEIGHT", 0.3))
+        context_token_budget = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 6000))
+        context_max_snippet_tokens = int(os.environ.get("CONTEXT_MAX_SNIPPET_TOKENS", 800))
+        context_tokenizer_encoding = os.environ.get("CONTEXT_TOKENIZER_ENCODING", "cl100k_base")
+        generation_timeout_seconds = float(os.environ.get("GENERATION_TIMEOUT_SECONDS", 90))
+        max_keyword_rewrites = int(os.environ.get("MAX_KEYWORD_REWRITES", 1))
+        batch_max_concurrency = int(os.environ.get("BATCH_MAX_CONCURRENCY", 4))
+        batch_max_size = int(os.environ.get("BATCH_MAX_SIZE", 100))
         mongodb_uri = os.environ.get("MONGODB_URI")
         mongodb_initdb_dev_username = os.environ.get("MONGODB_INITDB_DEV_USERNAME")
         mongodb_initdb_dev_password = os.environ.get("MONGODB_INITDB_DEV_PASSWORD")
+        catalog_cache_ttl_seconds = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", 60))
+        catalog_cache_refresh_seconds = float(os.environ.get("CATALOG_CACHE_REFRESH_SECONDS", 0))
+        filename_catalog_watch_changes = os.environ.get("FILENAME_CATALOG_WATCH_CHANGES", "false").lower() == "true"
+        retrieval_cache_max_bytes = int(os.environ.get("RETRIEVAL_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+        retrieval_cache_max_entries = int(os.environ.get("RETRIEVAL_CACHE_MAX_ENTRIES", 5000))
+        retrieval_cache_ttl_seconds = float(os.environ.get("RETRIEVAL_CACHE_TTL_SECONDS", 600))
+        instrumentation_enabled = os.environ.get("INSTRUMENTATION_ENABLED", "false").lower() == "true"
+        filename_shortlist_size = int(os.environ.get("FILENAME_SHORTLIST_SIZE", 30))
+        filename_auto_select_threshold = float(os.environ.get("FILENAME_AUTO_SELECT_THRESHOLD", 0))
         source_download_api_path_base = os.environ.get("SOURCE_DOWNLOAD_API_PATH_BASE")
+        page_image_cache_max_bytes = int(os.environ.get("PAGE_IMAGE_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+        page_image_cache_dir = os.environ.get("PAGE_IMAGE_CACHE_DIR") or None
+        page_image_cache_dir_max_bytes = int(os.environ.get("PAGE_IMAGE_CACHE_DIR_MAX_BYTES", 1024 * 1024 * 1024))
+        page_image_max_age_seconds = int(os.environ.get("PAGE_IMAGE_MAX_AGE_SECONDS", 86400))
         sql_host = os.environ.get("SQL_HOST")
         sql_port = int(os.environ.get("SQL_PORT"))
         sql_user = os.environ.get("SQL_USER")
@@ -70,18 +150,58 @@ class Environment_Config:
             api_key = api_key,
             base_url = base_url,
             generation_model = generation_model,
+            llm_max_connections = llm_max_connections,
+            llm_max_keepalive_connections = llm_max_keepalive_connections,
+            llm_timeout_seconds = llm_timeout_seconds,
             sql_generation_model = sql_generation_model,
             embedding_url = embedding_url,
             embedding_model = embedding_model,
+            embedding_batch_size = embedding_batch_size,
+            embedding_max_connections = embedding_max_connections,
+            embedding_cache_max_bytes = embedding_cache_max_bytes,
+            embedding_cache_path = embedding_cache_path,
+            answer_cache_max_bytes = answer_cache_max_bytes,
+            answer_cache_max_entries = answer_cache_max_entries,
+            answer_cache_ttl_seconds = answer_cache_ttl_seconds,
+            answer_cache_similarity_threshold = answer_cache_similarity_threshold,
             weaviate_host = weaviate_host,
             weaviate_port = weaviate_port,
             weaviate_grpc_port = weaviate_grpc_port,
             weaviate_user_key = weaviate_user_key,
             hybrid_search_alpha = hybrid_search_alpha,
+            retrieval_max_concurrency = retrieval_max_concurrency,
+            retrieval_timeout_seconds = retrieval_timeout_seconds,
+            rrf_k = rrf_k,
+            reranker = reranker,
+            reranker_model_path = reranker_model_path,
+            reranker_tokenizer_path = reranker_tokenizer_path,
+            reranker_batch_size = reranker_batch_size,
+            rerank_top_k = rerank_top_k,
+            rerank_bm25_weight = rerank_bm25_weight,
+            context_token_budget = context_token_budget,
+            context_max_snippet_tokens = context_max_snippet_tokens,
+            context_tokenizer_encoding = context_tokenizer_encoding,
+            generation_timeout_seconds = generation_timeout_seconds,
+            max_keyword_rewrites = max_keyword_rewrites,
+            batch_max_concurrency = batch_max_concurrency,
+            batch_max_size = batch_max_size,
             mongodb_uri = mongodb_uri,
             mongodb_initdb_dev_username = mongodb_initdb_dev_username,
             mongodb_initdb_dev_password = mongodb_initdb_dev_password,
+            catalog_cache_ttl_seconds = catalog_cache_ttl_seconds,
+            catalog_cache_refresh_seconds = catalog_cache_refresh_seconds,
+            filename_catalog_watch_changes = filename_catalog_watch_changes,
+            retrieval_cache_max_bytes = retrieval_cache_max_bytes,
+            retrieval_cache_max_entries = retrieval_cache_max_entries,
+            retrieval_cache_ttl_seconds = retrieval_cache_ttl_seconds,
+            instrumentation_enabled = instrumentation_enabled,
+            filename_shortlist_size = filename_shortlist_size,
+            filename_auto_select_threshold = filename_auto_select_threshold,
             source_download_api_path_base = source_download_api_path_base,
+            page_image_cache_max_bytes = page_image_cache_max_bytes,
+            page_image_cache_dir = page_image_cache_dir,
+            page_image_cache_dir_max_bytes = page_image_cache_dir_max_bytes,
+            page_image_max_age_seconds = page_image_max_age_seconds,
             sql_host = sql_host,
             sql_port = sql_port,
             sql_user = sql_user,
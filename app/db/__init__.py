@@ -1,22 +1,47 @@
 from .weaviate_client import WeaviateClientManager
 from .sql_client import SQLDatabaseManager
 from .mongodb_client import MongoDBManager
+from .page_image_store import PageImageStore
+from .retrieval_memo import RetrievalMemo
+from .retrieval_cache import RetrievalCache
 from configs.env_configs import env_config
 
 SQL_CONNECTION_URI = f"mssql+pyodbc://{env_config.sql_user}:{env_config.sql_pass}@{env_config.sql_host}:{env_config.sql_port}/{env_config.sql_db}?driver=ODBC+Driver+18+for+SQL+Server&Encrypt=no"
 
+retrieval_cache = None
+if env_config.retrieval_cache_max_bytes > 0:
+    retrieval_cache = RetrievalCache(
+        max_bytes=env_config.retrieval_cache_max_bytes,
+        max_entries=env_config.retrieval_cache_max_entries,
+        ttl_seconds=env_config.retrieval_cache_ttl_seconds
+    )
+
 weaviate_client_manager = WeaviateClientManager(
     host=env_config.weaviate_host, 
     port=env_config.weaviate_port,
     grpc_port=env_config.weaviate_grpc_port, 
     user_key=env_config.weaviate_user_key,
-    alpha=env_config.hybrid_search_alpha
+    alpha=env_config.hybrid_search_alpha,
+    catalog_ttl_seconds=env_config.catalog_cache_ttl_seconds,
+    catalog_refresh_interval_seconds=env_config.catalog_cache_refresh_seconds,
+    retrieval_cache=retrieval_cache
 )
 
 mongodb_manager = MongoDBManager(
     host=env_config.mongodb_uri,
     user=env_config.mongodb_initdb_dev_username,
-    password=env_config.mongodb_initdb_dev_password
+    password=env_config.mongodb_initdb_dev_password,
+    catalog_ttl_seconds=env_config.catalog_cache_ttl_seconds,
+    catalog_refresh_interval_seconds=env_config.catalog_cache_refresh_seconds,
+    filename_catalog_watch_changes=env_config.filename_catalog_watch_changes,
+    retrieval_cache=retrieval_cache
+)
+
+page_image_store = PageImageStore(
+    mongodb_manager=mongodb_manager,
+    max_bytes=env_config.page_image_cache_max_bytes,
+    cache_dir=env_config.page_image_cache_dir,
+    cache_dir_max_bytes=env_config.page_image_cache_dir_max_bytes
 )
 
 if env_config.sql_endpoint_enabled:
@@ -34,6 +59,10 @@ def get_mongodb_manager() -> MongoDBManager:
     """Dependency provider for FastAPI."""
     return mongodb_manager
 
+def get_page_image_store() -> PageImageStore:
+    """Dependency provider for FastAPI."""
+    return page_image_store
+
 def get_sql_manager() -> SQLDatabaseManager:
     """Dependency provider for FastAPI."""
     return sql_manager
\ No newline at end of file
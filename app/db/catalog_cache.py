@@ -0,0 +1,71 @@
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.logger import logger
+
+class CatalogCache:
+
+    """
+    TTL cache for catalog listings (database names, collection names, ...)
+    - Entries are reloaded lazily through their loader once older than `ttl_seconds`
+    - `invalidate` drops a single key or the whole cache
+    - Optional daemon thread reloading every known key each `refresh_interval_seconds`
+    """
+
+    def __init__(self, ttl_seconds : float, refresh_interval_seconds : float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+
+        self._entries : Dict[Hashable, Tuple[Any, float]] = {}
+        self._loaders : Dict[Hashable, Callable[[], Any]] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._refresh_thread : Optional[Thread] = None
+
+        if refresh_interval_seconds > 0:
+            self._refresh_thread = Thread(target=self._refresh_loop, name="catalog-cache-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def get(self, key : Hashable, loader : Callable[[], Any], force : bool = False) -> Any:
+        entry = self._entries.get(key)
+        if not force and entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            return entry[0]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._loaders[key] = loader
+        return value
+
+    def invalidate(self, key : Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._loaders.clear()
+            else:
+                self._entries.pop(key, None)
+                self._loaders.pop(key, None)
+
+    def invalidate_where(self, predicate : Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._entries.pop(key, None)
+                self._loaders.pop(key, None)
+
+    def refresh_all(self) -> None:
+        with self._lock:
+            loaders = list(self._loaders.items())
+
+        for key, loader in loaders:
+            try:
+                self.get(key, loader, force=True)
+            except Exception as e:
+                logger.warning(f"Catalog cache refresh failed for {key}: {str(e)}")
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval_seconds):
+            self.refresh_all()
@@ -0,0 +1,115 @@
+import time
+from threading import Lock, Thread
+from typing import Any, Dict, Optional
+from pymongo.collection import Collection as MongoDBCollection
+
+from utils.logger import logger
+
+class FilenameCatalog:
+
+    """
+    Stable id -> filename mapping for one files collection
+    - Ids are assigned in first-seen order and never change while the file exists
+    - Refreshed once older than `ttl_seconds`, reading only documents newer than the last seen `_id`
+    - Rebuilt from scratch when the document count no longer matches (deletes, out-of-order inserts)
+    - Optionally invalidated by a change stream (replica sets only)
+    """
+
+    def __init__(self, collection : MongoDBCollection, field_name : str = "filename", ttl_seconds : float = 60, watch_changes : bool = False):
+        self.collection = collection
+        self.field_name = field_name
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+
+        self._filenames : Dict[str, str] = {}
+        self._snapshot : Dict[str, str] = {}
+        self._ids_by_filename : Dict[str, str] = {}
+        self._next_id = 1
+        self._last_object_id : Optional[Any] = None
+        self._document_count = 0
+        self._refreshed_at : Optional[float] = None
+        self._needs_rebuild = False
+        self._lock = Lock()
+
+        if watch_changes:
+            Thread(target=self._watch_changes, name=f"filename-catalog-{collection.full_name}", daemon=True).start()
+
+    def get(self) -> Dict[str, str]:
+        """Return the id -> filename mapping ordered by id, refreshing it first when stale."""
+        if self._is_stale():
+            self.refresh()
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._refreshed_at = None
+
+    def refresh(self) -> None:
+        with self._lock:
+            if not self._is_stale():
+                return
+
+            changed = self._load({"_id": {"$gt": self._last_object_id}} if self._last_object_id is not None else {})
+
+            if self._needs_rebuild or self.collection.estimated_document_count() != self._document_count:
+                changed = self._rebuild() or changed
+                self._needs_rebuild = False
+
+            if changed:
+                self._snapshot = {file_id: self._filenames[file_id] for file_id in sorted(self._filenames, key=int)}
+                self.version += 1
+            self._refreshed_at = time.monotonic()
+
+    def _is_stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.ttl_seconds
+
+    def _load(self, match_filter : Dict[str, Any]) -> bool:
+        cursor = self.collection.find(match_filter, {self.field_name: 1}).sort("_id", 1)
+
+        changed = False
+        for document in cursor:
+            self._document_count += 1
+            self._last_object_id = document["_id"]
+            changed = self._add(document.get(self.field_name)) or changed
+        return changed
+
+    def _rebuild(self) -> bool:
+        previous = dict(self._ids_by_filename)
+        self._ids_by_filename = {}
+        self._filenames = {}
+        self._document_count = 0
+        self._last_object_id = None
+
+        cursor = self.collection.find({}, {self.field_name: 1}).sort("_id", 1)
+        for document in cursor:
+            self._document_count += 1
+            self._last_object_id = document["_id"]
+            filename = document.get(self.field_name)
+            if filename and filename not in self._ids_by_filename and filename in previous:
+                self._ids_by_filename[filename] = previous[filename]
+                self._filenames[previous[filename]] = filename
+            else:
+                self._add(filename)
+
+        logger.info(f"Rebuilt filename catalog for {self.collection.full_name}: {len(self._filenames)} files")
+        return previous != self._ids_by_filename
+
+    def _add(self, filename : Optional[str]) -> bool:
+        if not filename or filename in self._ids_by_filename:
+            return False
+
+        file_id = str(self._next_id)
+        self._next_id += 1
+        self._ids_by_filename[filename] = file_id
+        self._filenames[file_id] = filename
+        return True
+
+    def _watch_changes(self) -> None:
+        try:
+            with self.collection.watch([{"$match": {"operationType": {"$in": ["insert", "delete", "replace", "update"]}}}]) as stream:
+                for change in stream:
+                    # Updates can rename files, which an incremental load would not see
+                    if change["operationType"] != "insert":
+                        self._needs_rebuild = True
+                    self.invalidate()
+        except Exception as e:
+            logger.warning(f"Change stream unavailable for {self.collection.full_name}, using TTL refresh only: {str(e)}")
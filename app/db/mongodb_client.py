@@ -1,21 +1,48 @@
+import asyncio
 import gridfs
 import base64
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from io import BytesIO
+from gridfs import GridOut
 from pymongo import MongoClient
 from pymongo.database import Database as MongoDBDatabase
 from pymongo.collection import Collection as MongoDBCollection
 from langchain.schema import Document
+from threading import Lock
 from typing import List, Dict, Any, Tuple, Optional, Set
 
+from db.catalog_cache import CatalogCache
+from db.filename_catalog import FilenameCatalog
+from db.retrieval_cache import RetrievalCache
+from db.retrieval_memo import RetrievalMemo
+from utils.concurrency import gather_bounded
+
+# Chunk fields read by the agentic RAG nodes (context, sourcing and download links)
+CHUNK_SEARCH_PROJECTION = {"content": 1, "filename": 1, "fileId": 1, "chunk_index": 1}
+
 class MongoDBManager:
 
     """
     MongoDB database manager
     - Connect, manage and search mongodb 
     - Download files from db
+    - Async variants (prefixed with `a`) run the blocking pymongo calls in a worker thread
+    - Database / collection names are served from a TTL catalog cache
+    - Per-collection filename catalogs with stable ids
+    - Optional `$text` search results cache shared across requests, keyed by collection version
     """
 
-    def __init__(self, host : str, user : str, password : str):
+    def __init__(
+        self,
+        host : str,
+        user : str,
+        password : str,
+        catalog_ttl_seconds : float = 60,
+        catalog_refresh_interval_seconds : float = 0,
+        filename_catalog_watch_changes : bool = False,
+        retrieval_cache : Optional[RetrievalCache] = None
+    ):
 
         self.client = MongoClient(
             host=host,
@@ -26,14 +53,25 @@ class MongoDBManager:
         if not self.client.admin.command('ping').get("ok") == 1:
             raise ConnectionError("Can't connect to an instance of mongodb database")
 
+        self.catalog_cache = CatalogCache(
+            ttl_seconds=catalog_ttl_seconds,
+            refresh_interval_seconds=catalog_refresh_interval_seconds
+        )
+        self.catalog_ttl_seconds = catalog_ttl_seconds
+        self.filename_catalog_watch_changes = filename_catalog_watch_changes
+        self.filename_catalogs : Dict[Tuple[str, str, str], FilenameCatalog] = {}
+        self._filename_catalogs_lock = Lock()
+        self.retrieval_cache = retrieval_cache
+
     def get_mongodb_db(self, db_name : str) -> MongoDBDatabase:
         return self.client[db_name]
 
     def check_db_existence(self, db_name : str) -> bool:
-        db_list = self.client.list_database_names()
-        if db_name not in db_list:
-            return False
-        return True
+        loader = lambda: set(self.client.list_database_names())
+        if db_name in self.catalog_cache.get("databases", loader):
+            return True
+        # A miss may be a database created after the listing was cached
+        return db_name in self.catalog_cache.get("databases", loader, force=True)
         
     def get_mongodb_collection(self, db_name : str, collection_name : str) -> MongoDBCollection:
         db = self.get_mongodb_db(db_name)
@@ -41,11 +79,45 @@ class MongoDBManager:
         return collection
     
     def check_collection_existence(self, db_name : str, collection_name : str) -> bool:
-        db = self.get_mongodb_db(db_name)
-        collection_list = db.list_collection_names()
-        if collection_name not in collection_list:
-            return False
-        return True
+        key = ("collections", db_name)
+        loader = lambda: set(self.get_mongodb_db(db_name).list_collection_names())
+        if collection_name in self.catalog_cache.get(key, loader):
+            return True
+        return collection_name in self.catalog_cache.get(key, loader, force=True)
+
+    def get_collection_version(self, db_name : str, collection_name : str) -> Tuple[int, Any]:
+        """
+        Change marker for a collection, cached like the catalog: (estimated document count, newest `_id`).
+        Re-ingestion inserts new ObjectIds, so the marker changes even when the count doesn't.
+        """
+        return self.catalog_cache.get(
+            ("version", db_name, collection_name),
+            partial(self._load_collection_version, db_name, collection_name)
+        )
+
+    def _load_collection_version(self, db_name : str, collection_name : str) -> Tuple[int, Any]:
+        collection = self.get_mongodb_collection(db_name, collection_name)
+        newest = list(collection.find({}, {"_id": 1}).sort("_id", -1).limit(1))
+        return collection.estimated_document_count(), newest[0]["_id"] if newest else None
+
+    def invalidate_catalog(self, db_name : Optional[str] = None) -> None:
+        """Drop cached names and versions: those of `db_name`, or everything when omitted."""
+        if db_name is None:
+            self.catalog_cache.invalidate()
+        else:
+            self.catalog_cache.invalidate("databases")
+            self.catalog_cache.invalidate_where(lambda key: isinstance(key, tuple) and key[1] == db_name)
+
+    def invalidate_collection(self, db_name : str, collection_name : Optional[str] = None) -> int:
+        """
+        Forget the versions and cached search results of a collection (or of every collection of `db_name`),
+        e.g. after ingestion. Returns the number of dropped results.
+        """
+        namespace = (db_name,) if collection_name is None else (db_name, collection_name)
+        self.catalog_cache.invalidate_where(lambda key: isinstance(key, tuple) and key[0] == "version" and key[1:1 + len(namespace)] == namespace)
+        if self.retrieval_cache is None:
+            return 0
+        return self.retrieval_cache.invalidate("mongodb", *namespace)
     
     def get_all_records(self, db_name : str, collection_name : str) -> List[Dict[str, any]]:
         collection = self.get_mongodb_collection(db_name, collection_name)
@@ -64,8 +136,66 @@ class MongoDBManager:
         collection_name: str,
         query: str,
         filenames: Optional[List[str]] = None,
-        top_k: int = 100
+        top_k: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+
+        raw_docs = self._text_search_raw(db_name, collection_name, query, filenames, top_k, projection)
+        return self._process_query_returns(raw_docs)
+
+    def full_text_search_many(
+        self,
+        db_name: str,
+        collection_name: str,
+        queries: List[str],
+        filenames: Optional[List[str]] = None,
+        top_k: int = 100,
+        projection: Optional[Dict[str, Any]] = CHUNK_SEARCH_PROJECTION,
+        max_concurrency: int = 8
     ) -> List[Document]:
+        """
+        Run one `$text` search per query concurrently on the pooled client.
+        Results are deduplicated by `_id` (best score wins), sorted by score, cut to `top_k`
+        and tagged with the query that found them in `metadata["query"]`.
+        """
+        if not queries:
+            return []
+
+        search = partial(self._text_search_raw, db_name, collection_name, filenames=filenames, top_k=top_k, projection=projection)
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(queries))) as executor:
+            responses = list(executor.map(search, queries))
+
+        return self._merge_text_search_responses(queries, responses, top_k)
+
+    def _text_search_raw(
+        self,
+        db_name: str,
+        collection_name: str,
+        query: str,
+        filenames: Optional[List[str]] = None,
+        top_k: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """`$text` search served from the retrieval cache when possible, keyed by the collection version."""
+        if self.retrieval_cache is None:
+            return self._search_text(db_name, collection_name, query, filenames, top_k, projection)
+
+        return self.retrieval_cache.get_or_load(
+            ("mongodb", db_name, collection_name),
+            self.get_collection_version(db_name, collection_name),
+            self._text_search_key(query, filenames, top_k, projection),
+            partial(self._search_text, db_name, collection_name, query, filenames, top_k, projection)
+        )
+
+    def _search_text(
+        self,
+        db_name: str,
+        collection_name: str,
+        query: str,
+        filenames: Optional[List[str]] = None,
+        top_k: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
 
         search_query = {
             "$text": {"$search": query}
@@ -79,14 +209,39 @@ class MongoDBManager:
         cursor = (
             collection.find(
                 search_query,
-                {"score": {"$meta": "textScore"}}
+                {**(projection or {}), "score": {"$meta": "textScore"}}
             )
             .sort([("score", {"$meta": "textScore"})])
             .limit(top_k)
         )
 
-        raw_docs = list(cursor)
-        return self._process_query_returns(raw_docs)
+        return list(cursor)
+
+    @staticmethod
+    def _text_search_key(query: str, filenames: Optional[List[str]], top_k: int, projection: Optional[Dict[str, Any]]) -> tuple:
+        return (query, tuple(filenames or ()), top_k, tuple(sorted((projection or {}).items())))
+
+    def _merge_text_search_responses(
+        self,
+        queries: List[str],
+        responses: List[Optional[List[Dict[str, Any]]]],
+        top_k: int
+    ) -> List[Document]:
+
+        best_matches: Dict[Any, Tuple[float, Dict[str, Any], str]] = {}
+        for query, raw_docs in zip(queries, responses):
+            for raw_doc in raw_docs or []:
+                score = raw_doc.get("score", 0)
+                current = best_matches.get(raw_doc["_id"])
+                if current is None or score > current[0]:
+                    best_matches[raw_doc["_id"]] = (score, raw_doc, query)
+
+        ranked = sorted(best_matches.values(), key=lambda match: match[0], reverse=True)[:top_k]
+
+        docs = self._process_query_returns([raw_doc for _, raw_doc, _ in ranked])
+        for doc, (_, _, source_query) in zip(docs, ranked):
+            doc.metadata["query"] = source_query
+        return docs
 
     def get_file_from_gridfs_by_filename(self, db_name: str, collection : str, file_name: str, gridfs_collection : str = "files") -> Tuple[str, str, BytesIO]:
 
@@ -115,6 +270,26 @@ class MongoDBManager:
 
         return file_size, filename, content_stream
 
+    def open_gridfs_file_by_filename(self, db_name: str, collection : str, file_name: str, gridfs_collection : str = "files") -> GridOut:
+        """
+        Open a GridFS file without reading it. The returned GridOut fetches chunks lazily
+        (`readchunk`, `seek`) and exposes `length`, `md5`, `upload_date` and `chunk_size`.
+        """
+        db = self.get_mongodb_db(db_name)
+        collection = self.get_mongodb_collection(db_name, collection)
+
+        file_doc = collection.find_one({"filename" : file_name}, {"_id" : 1})
+
+        if file_doc is None:
+            raise FileNotFoundError(f"GridFS file '{file_name}' not found in fs.files")
+
+        fs = gridfs.GridFS(db, collection=gridfs_collection)
+
+        try:
+            return fs.get(file_doc["_id"])
+        except Exception:
+            raise FileNotFoundError(f"Failed to read GridFS file '{file_name}'")
+
     def get_file_from_collection(
         self, 
         db_name: str,
@@ -123,9 +298,47 @@ class MongoDBManager:
         buffer_field: str = "originalBuffer"
     ) -> Tuple[str, BytesIO]:
 
+        file_bytes = self.get_file_bytes_from_collection(db_name, collection_name, search_record, buffer_field)
+        content_stream = BytesIO(file_bytes)
+
+        file_size = str(len(file_bytes))
+
+        return file_size, content_stream
+
+    def get_filename_catalog(self, db_name: str, collection_name: str, field_name: str = "filename") -> Dict[str, str]:
+        """Stable id -> filename mapping for a files collection, served from a cached FilenameCatalog."""
+        key = (db_name, collection_name, field_name)
+        catalog = self.filename_catalogs.get(key)
+        if catalog is None:
+            with self._filename_catalogs_lock:
+                catalog = self.filename_catalogs.get(key)
+                if catalog is None:
+                    catalog = FilenameCatalog(
+                        collection=self.get_mongodb_collection(db_name, collection_name),
+                        field_name=field_name,
+                        ttl_seconds=self.catalog_ttl_seconds,
+                        watch_changes=self.filename_catalog_watch_changes
+                    )
+                    self.filename_catalogs[key] = catalog
+        return catalog.get()
+
+    def get_filename_catalog_version(self, db_name: str, collection_name: str, field_name: str = "filename") -> int:
+        """Change counter of the cached filename catalog (0 before its first load), without refreshing it."""
+        catalog = self.filename_catalogs.get((db_name, collection_name, field_name))
+        return catalog.version if catalog is not None else 0
+
+    def get_file_bytes_from_collection(
+        self,
+        db_name: str,
+        collection_name: str,
+        search_record : Dict[str, Any],
+        buffer_field: str = "originalBuffer"
+    ) -> bytes:
+        """Fetch only `buffer_field` of the matching document and return it base64-decoded."""
+
         collection = self.get_mongodb_collection(db_name, collection_name)
 
-        document = collection.find_one(search_record)
+        document = collection.find_one(search_record, {buffer_field : 1, "_id" : 0})
         if document is None:
             raise FileNotFoundError(f"File '{search_record}' not found.")
 
@@ -134,15 +347,9 @@ class MongoDBManager:
             raise FileNotFoundError(f"No binary data found for '{search_record}'")
 
         try:
-            file_bytes = base64.b64decode(base64_data)
+            return base64.b64decode(base64_data)
         except Exception:
-            raise FileNotFoundError("originalBuffer is not valid base64")
-
-        content_stream = BytesIO(file_bytes)
-
-        file_size = str(len(file_bytes))
-
-        return file_size, content_stream
+            raise FileNotFoundError(f"{buffer_field} is not valid base64")
 
     def get_unique_field_values(self, db_name: str, collection_name: str, field_name: str) -> Dict[str, int]:
 
@@ -166,10 +373,85 @@ class MongoDBManager:
         if not result:
             return dict()
 
-        unique_values = set(result[0].get("values", []))
+        unique_values = sorted(set(result[0].get("values", [])))
         unique_dict = { str(idx + 1): value for idx, value in enumerate(unique_values) }
         return unique_dict
 
+    async def acheck_db_existence(self, db_name : str) -> bool:
+        return await asyncio.to_thread(self.check_db_existence, db_name)
+
+    async def acheck_collection_existence(self, db_name : str, collection_name : str) -> bool:
+        return await asyncio.to_thread(self.check_collection_existence, db_name, collection_name)
+
+    async def aget_collection_version(self, db_name : str, collection_name : str) -> Tuple[int, Any]:
+        return await asyncio.to_thread(self.get_collection_version, db_name, collection_name)
+
+    async def aget_record(self, db_name : str, collection_name : str, search_record : Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_record, db_name, collection_name, search_record)
+
+    async def afull_text_search(
+        self,
+        db_name: str,
+        collection_name: str,
+        query: str,
+        filenames: Optional[List[str]] = None,
+        top_k: int = 100
+    ) -> List[Document]:
+        return await asyncio.to_thread(self.full_text_search, db_name, collection_name, query, filenames, top_k)
+
+    async def afull_text_search_many(
+        self,
+        db_name: str,
+        collection_name: str,
+        queries: List[str],
+        filenames: Optional[List[str]] = None,
+        top_k: int = 100,
+        projection: Optional[Dict[str, Any]] = CHUNK_SEARCH_PROJECTION,
+        max_concurrency: int = 8,
+        timeout_seconds: Optional[float] = None,
+        memo: Optional[RetrievalMemo] = None
+    ) -> List[Document]:
+        """
+        Async variant of `full_text_search_many`; searches still running after `timeout_seconds` are dropped.
+        With a `memo`, identical searches already run (or running) in the same scope are shared.
+        """
+        search = partial(self._text_search_raw, db_name, collection_name, filenames=filenames, top_k=top_k, projection=projection)
+
+        def factory(query: str):
+            call = partial(asyncio.to_thread, search, query)
+            if memo is None:
+                return call
+            key = ("mongodb", db_name, collection_name, *self._text_search_key(query, filenames, top_k, projection))
+            return partial(memo.aget, key, call)
+
+        responses = await gather_bounded(
+            [factory(query) for query in queries],
+            max_concurrency=max_concurrency,
+            timeout_seconds=timeout_seconds
+        )
+        return self._merge_text_search_responses(queries, responses, top_k)
+
+    async def aget_file_from_gridfs_by_filename(self, db_name: str, collection : str, file_name: str, gridfs_collection : str = "files") -> Tuple[str, str, BytesIO]:
+        return await asyncio.to_thread(self.get_file_from_gridfs_by_filename, db_name, collection, file_name, gridfs_collection)
+
+    async def aopen_gridfs_file_by_filename(self, db_name: str, collection : str, file_name: str, gridfs_collection : str = "files") -> GridOut:
+        return await asyncio.to_thread(self.open_gridfs_file_by_filename, db_name, collection, file_name, gridfs_collection)
+
+    async def aget_file_from_collection(
+        self, 
+        db_name: str,
+        collection_name: str,
+        search_record : Dict[str, Any],
+        buffer_field: str = "originalBuffer"
+    ) -> Tuple[str, BytesIO]:
+        return await asyncio.to_thread(self.get_file_from_collection, db_name, collection_name, search_record, buffer_field)
+
+    async def aget_filename_catalog(self, db_name: str, collection_name: str, field_name: str = "filename") -> Dict[str, str]:
+        return await asyncio.to_thread(self.get_filename_catalog, db_name, collection_name, field_name)
+
+    async def aget_unique_field_values(self, db_name: str, collection_name: str, field_name: str) -> Dict[str, int]:
+        return await asyncio.to_thread(self.get_unique_field_values, db_name, collection_name, field_name)
+
     def _process_query_returns(self, raw_docs: List[Dict[str, Any]]) -> List[Document]:
         langchain_docs = []
 
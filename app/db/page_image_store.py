@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import mmap
+import os
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from db.mongodb_client import MongoDBManager
+from utils.lru_cache import LRUCache
+from utils.logger import logger
+
+PageKey = Tuple[str, str, str, int]
+
+# Eviction frees the disk cache down to this share of its budget, so the directory rescan stays rare
+DISK_LOW_WATER_RATIO = 0.9
+
+@dataclass(frozen=True)
+class PageImage:
+    content : bytes
+    etag : str
+
+class PageImageStore:
+
+    """
+    Decoded page images served for citation links
+    - Fetches only the buffer field of a page document and base64-decodes it once
+    - Keeps decoded bytes in a byte-bounded LRU keyed by (db, collection, fileId, chunk_index)
+    - Optional local directory of decoded files, read back through mmap after a restart or eviction,
+      bounded by `cache_dir_max_bytes` with least recently used files (by mtime) evicted first
+    - `invalidate` drops the pages of a file, collection or database from both layers after re-ingestion
+    """
+
+    def __init__(
+        self,
+        mongodb_manager : MongoDBManager,
+        max_bytes : int,
+        cache_dir : Optional[str] = None,
+        cache_dir_max_bytes : int = 1024 * 1024 * 1024,
+        buffer_field : str = "originalBuffer"
+    ):
+        self.mongodb_manager = mongodb_manager
+        self.buffer_field = buffer_field
+        self.cache = LRUCache(max_bytes=max_bytes, sizeof=lambda image: len(image.content))
+        self.cache_dir = cache_dir
+        self.cache_dir_max_bytes = cache_dir_max_bytes
+        self._disk_lock = Lock()
+        self._disk_bytes = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def get(self, db_name : str, collection_name : str, file_id : str, chunk_index : int) -> PageImage:
+        key = (db_name, collection_name, file_id, chunk_index)
+
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+        return self._load(key)
+
+    async def aget(self, db_name : str, collection_name : str, file_id : str, chunk_index : int) -> PageImage:
+        key = (db_name, collection_name, file_id, chunk_index)
+
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+        return await asyncio.to_thread(self._load, key)
+
+    def _load(self, key : PageKey) -> PageImage:
+        db_name, collection_name, file_id, chunk_index = key
+
+        content = self._read_from_disk(key)
+        if content is None:
+            content = self.mongodb_manager.get_file_bytes_from_collection(
+                db_name,
+                collection_name,
+                {"fileId" : file_id, "chunk_index" : chunk_index},
+                self.buffer_field
+            )
+            self._write_to_disk(key, content)
+
+        image = PageImage(content=content, etag=f'"{hashlib.sha1(content).hexdigest()}"')
+        self.cache.set(key, image)
+        return image
+
+    def invalidate(self, db_name : str, collection_name : Optional[str] = None, file_id : Optional[str] = None) -> int:
+        """
+        Drop cached pages of one file, of a collection when `file_id` is omitted,
+        or of the whole database when `collection_name` is omitted too. Returns the number of dropped entries (memory and disk).
+        """
+        scope = tuple(part for part in (db_name, collection_name, file_id) if part is not None)
+        removed = self.cache.pop_where(lambda key: key[:len(scope)] == scope)
+
+        if self.cache_dir:
+            prefix = self._disk_prefix(*scope)
+            with self._disk_lock:
+                for path, size, _ in self._disk_files():
+                    if os.path.basename(path).startswith(prefix) and self._remove_file(path):
+                        self._disk_bytes -= size
+                        removed += 1
+        return removed
+
+    def _disk_prefix(self, *parts : str) -> str:
+        return "".join(f"{hashlib.sha1(part.encode('utf-8')).hexdigest()[:16]}_" for part in parts)
+
+    def _disk_path(self, key : PageKey) -> str:
+        db_name, collection_name, file_id, chunk_index = key
+        return os.path.join(self.cache_dir, f"{self._disk_prefix(db_name, collection_name, file_id)}{chunk_index}.jpg")
+
+    def _disk_files(self) -> List[Tuple[str, int, float]]:
+        """(path, size, mtime) of every finished cache file."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    @staticmethod
+    def _remove_file(path : str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _read_from_disk(self, key : PageKey) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                # Bump the mtime so eviction treats the file as recently used
+                os.utime(f.fileno())
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[:]
+        except FileNotFoundError:
+            return None
+
+    def _write_to_disk(self, key : PageKey, content : bytes) -> None:
+        if not self.cache_dir or len(content) > self.cache_dir_max_bytes:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Can't write page image cache file {path}: {str(e)}")
+            return
+
+        with self._disk_lock:
+            self._disk_bytes += len(content)
+            if self._disk_bytes > self.cache_dir_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove the least recently used files down to the low-water mark. Caller holds `_disk_lock`."""
+        # Rescan instead of trusting the running total: other workers may share the directory
+        files = sorted(self._disk_files(), key=lambda file: file[2])
+        self._disk_bytes = sum(size for _, size, _ in files)
+
+        low_water = self.cache_dir_max_bytes * DISK_LOW_WATER_RATIO
+        for path, size, _ in files:
+            if self._disk_bytes <= low_water:
+                break
+            if self._remove_file(path):
+                self._disk_bytes -= size
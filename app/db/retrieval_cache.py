@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.lru_cache import LRUCache
+
+# Rough per-result overhead (object / dict / metadata) added to the text size for the byte budget
+RESULT_OVERHEAD_BYTES = 256
+
+Namespace = Tuple[str, ...]
+
+def estimate_results_size(results : List[Any]) -> int:
+    """Approximate memory of raw search results: their text plus a fixed overhead each."""
+    size = 0
+    for result in results:
+        fields = result if isinstance(result, dict) else getattr(result, "properties", {})
+        size += RESULT_OVERHEAD_BYTES + sum(len(str(value)) for value in fields.values())
+    return size
+
+class RetrievalCache:
+
+    """
+    Raw search results shared across requests (Weaviate hybrid queries, MongoDB `$text` searches)
+    - Keyed by (namespace, collection version, query key): the namespace names the collection,
+      the query key holds the query text, vector, alpha, target vector, filters and limit
+    - A new collection version (polled through the catalog cache, see the managers' `get_collection_version`)
+      stops old entries from matching; they are evicted by LRU
+    - Single-flight: concurrent misses on the same key share one backend call
+    - LRU bounded by approximate result bytes and entry count, TTL as a safety net for in-place updates
+    - `invalidate(*namespace)` drops a collection's entries right away, e.g. after ingestion
+    """
+
+    def __init__(self, max_bytes : int, max_entries : Optional[int] = None, ttl_seconds : Optional[float] = None):
+        self.cache = LRUCache(
+            max_bytes=max_bytes,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            sizeof=estimate_results_size
+        )
+        self._flights : Dict[Hashable, Future] = {}
+        self._flights_lock = Lock()
+
+    def get_or_load(self, namespace : Namespace, version : Hashable, query_key : Hashable, loader : Callable[[], List[Any]]) -> List[Any]:
+        """Cached results, or `loader()` run once for all threads missing the same key at the same time."""
+        key = (namespace, version, query_key)
+        with self._flights_lock:
+            results = self.cache.get(key)
+            if results is not None:
+                return results
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+
+        if not leader:
+            return flight.result()
+
+        try:
+            results = loader()
+            self.cache.set(key, results)
+            flight.set_result(results)
+            return results
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+
+    def invalidate(self, *namespace : str) -> int:
+        """Drop every entry under `namespace` (or a prefix of it). Returns the number of dropped entries."""
+        return self.cache.pop_where(lambda key: key[0][:len(namespace)] == namespace)
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
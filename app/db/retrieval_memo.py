@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+class RetrievalMemo:
+
+    """
+    Shares identical retrieval calls inside one scope (a request and its keyword retries, or a batch)
+    - The first caller of a key starts the call, concurrent and later callers await the same task
+    - `aget_many` resolves several keys with one batched call for the missing ones (e.g. embeddings)
+    - A caller being cancelled (timeout) does not cancel the shared call for the others
+    - Failed calls are forgotten so the next caller retries them
+    """
+
+    def __init__(self):
+        self._tasks : Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key : Hashable) -> bool:
+        task = self._tasks.get(key)
+        return task is not None and not (task.done() and (task.cancelled() or task.exception() is not None))
+
+    async def aget(self, key : Hashable, factory : Callable[[], Awaitable[T]]) -> T:
+        if self._cached(key):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._tasks[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(self._tasks[key])
+
+    async def aget_many(self, keys : Sequence[Hashable], factory : Callable[[List[Hashable]], Awaitable[List[T]]]) -> List[T]:
+        """`factory` receives the keys not resolved yet and returns their values in the same order."""
+        missing = [key for key in dict.fromkeys(keys) if not self._cached(key)]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            batch = asyncio.ensure_future(factory(missing))
+
+            async def pick(index : int) -> T:
+                return (await batch)[index]
+
+            for index, key in enumerate(missing):
+                self._tasks[key] = asyncio.ensure_future(pick(index))
+
+        return list(await asyncio.shield(asyncio.gather(*(self._tasks[key] for key in keys))))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._tasks), "hits": self.hits, "misses": self.misses}
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import json
 from sqlalchemy import create_engine, MetaData, text, Table, inspect, Column, String
 from sqlalchemy.exc import SQLAlchemyError
@@ -116,6 +117,10 @@ class SQLDatabaseManager:
             logger.info("Database error:", e)
             raise
 
+    async def aexecute_sql(self, sql_query: str, params: dict | None = None):
+        """Async variant of `execute_sql`, run in a worker thread."""
+        return await asyncio.to_thread(self.execute_sql, sql_query, params)
+
     def get_table_columns(self, table_name: str):
         """Get a list of columns for a table."""
         inspector = inspect(self.engine)
@@ -1,14 +1,32 @@
+import asyncio
 import weaviate
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from weaviate.collections import Collection
 from weaviate.classes.init import Auth
-from weaviate.classes.query import Filter, MetadataQuery, BM25Operator
+from weaviate.classes.query import Filter, MetadataQuery, BM25Operator, Sort
 from weaviate.collections.classes.internal import Object as WeaviateObject
 from langchain_core.documents import Document
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from db.catalog_cache import CatalogCache
+from db.retrieval_cache import RetrievalCache
+from db.retrieval_memo import RetrievalMemo
+from utils.concurrency import gather_bounded
 
 class WeaviateClientManager:
 
-    def __init__(self, host: str, port: str, grpc_port : str, user_key: str, alpha : float) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: str,
+        grpc_port : str,
+        user_key: str,
+        alpha : float,
+        catalog_ttl_seconds : float = 60,
+        catalog_refresh_interval_seconds : float = 0,
+        retrieval_cache : Optional[RetrievalCache] = None
+    ) -> None:
 
         self.client = weaviate.connect_to_local(
             host=host,
@@ -20,10 +38,52 @@ class WeaviateClientManager:
 
         if not self.client.is_live():
             raise ConnectionError("Can't connect to an instance of weaviate database")
+
+        self.catalog_cache = CatalogCache(
+            ttl_seconds=catalog_ttl_seconds,
+            refresh_interval_seconds=catalog_refresh_interval_seconds
+        )
+        self.retrieval_cache = retrieval_cache
         
     def check_collection_existence(self, collection_name : str) -> bool:
-        collection = self.client.collections.get(collection_name)
-        return collection.exists()
+        # Weaviate stores collection names with a capitalized first letter
+        names = {collection_name, collection_name[:1].upper() + collection_name[1:]}
+        loader = lambda: set(self.client.collections.list_all(simple=True))
+        if names & self.catalog_cache.get("collections", loader):
+            return True
+        # A miss may be a collection created after the listing was cached
+        return bool(names & self.catalog_cache.get("collections", loader, force=True))
+
+    def invalidate_catalog(self) -> None:
+        self.catalog_cache.invalidate()
+
+    def invalidate_collection(self, collection_name : str) -> int:
+        """Forget the version and cached search results of a collection, e.g. after ingestion. Returns the number of dropped results."""
+        self.catalog_cache.invalidate(("version", collection_name))
+        if self.retrieval_cache is None:
+            return 0
+        return self.retrieval_cache.invalidate("weaviate", collection_name)
+
+    def get_collection_version(self, collection_name : str) -> Optional[Tuple[int, Any]]:
+        """
+        Change marker for a collection, cached like the catalog: (object count, latest object update time).
+        None when the collection doesn't index timestamps: a re-ingestion keeping the count would go unnoticed,
+        so callers must not cache anything derived from it.
+        """
+        return self.catalog_cache.get(("version", collection_name), partial(self._load_collection_version, collection_name))
+
+    def _load_collection_version(self, collection_name : str) -> Optional[Tuple[int, Any]]:
+        collection = self.get_collection(collection_name)
+        if not collection.config.get().inverted_index_config.index_timestamps:
+            return None
+
+        count = collection.aggregate.over_all(total_count=True).total_count
+        latest = collection.query.fetch_objects(
+            limit=1,
+            sort=Sort.by_update_time(ascending=False),
+            return_metadata=MetadataQuery(last_update_time=True)
+        ).objects
+        return count, latest[0].metadata.last_update_time if latest else None
     
     def get_all_collections(self) -> List[str]:
         return self.client.collections.list_all()
@@ -33,6 +93,8 @@ class WeaviateClientManager:
     
     def delete_collection(self, collection_name : str) -> None:
         self.client.collections.delete(collection_name)
+        self.catalog_cache.invalidate("collections")
+        self.invalidate_collection(collection_name)
         
     def fetch_all_records_in_collection(self, collection_name : str) -> List[Document]:
         collection = self.get_collection(collection_name)
@@ -60,14 +122,136 @@ class WeaviateClientManager:
         return self._processing_query_returns(response.objects)
 
     def query_params(self, collection_name : str, params : Dict[str, Any]) -> List[Document]:
-        
+        return self._processing_query_returns(self._hybrid_objects(collection_name, params))
+
+    def query_many(
+        self,
+        collection_name : str,
+        params_list : List[Dict[str, Any]],
+        top_k : Optional[int] = None,
+        max_concurrency : int = 8
+    ) -> List[Document]:
+        """
+        Run several hybrid queries concurrently over the shared client.
+        Results are deduplicated by uuid (best score wins), sorted by score, cut to `top_k`
+        and tagged with the query that found them in `metadata["query"]`.
+        """
+        if not params_list:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(params_list))) as executor:
+            responses = list(executor.map(partial(self._hybrid_objects, collection_name), params_list))
+
+        return self._merge_query_responses(params_list, responses, top_k)
+
+    def _hybrid_objects(self, collection_name : str, params : Dict[str, Any]) -> List[WeaviateObject]:
+        """Hybrid search served from the retrieval cache when possible, keyed by the collection version."""
+        if self.retrieval_cache is None:
+            return self._search_hybrid(collection_name, params)
+
+        version = self.get_collection_version(collection_name)
+        if version is None:
+            return self._search_hybrid(collection_name, params)
+
+        return self.retrieval_cache.get_or_load(
+            ("weaviate", collection_name),
+            version,
+            self._hybrid_query_key(params),
+            partial(self._search_hybrid, collection_name, params)
+        )
+
+    def _search_hybrid(self, collection_name : str, params : Dict[str, Any]) -> List[WeaviateObject]:
         collection = self.get_collection(collection_name)
 
-        params["return_metadata"] = MetadataQuery(score=True, explain_score=True)
-        params["bm25_operator"] = BM25Operator.or_(minimum_match=2)
+        params = {
+            **params,
+            "return_metadata": MetadataQuery(score=True, explain_score=True),
+            "bm25_operator": BM25Operator.or_(minimum_match=2),
+        }
         response =  collection.query.hybrid(**params)
 
-        return self._processing_query_returns(response.objects)
+        return response.objects
+
+    @staticmethod
+    def _hybrid_query_key(params : Dict[str, Any]) -> tuple:
+        # The vector is derived from the query text, so the text stands in for it in the key
+        return (
+            params.get("query"),
+            params.get("limit"),
+            params.get("alpha"),
+            params.get("target_vector"),
+            repr(params.get("filters"))
+        )
+
+    def _merge_query_responses(
+        self,
+        params_list : List[Dict[str, Any]],
+        responses : List[Optional[List[WeaviateObject]]],
+        top_k : Optional[int] = None
+    ) -> List[Document]:
+
+        best_matches : Dict[Any, tuple] = {}
+        for params, objects in zip(params_list, responses):
+            for obj in objects or []:
+                score = obj.metadata.score if obj.metadata and obj.metadata.score is not None else 0
+                current = best_matches.get(obj.uuid)
+                if current is None or score > current[0]:
+                    best_matches[obj.uuid] = (score, obj, params.get("query"))
+
+        ranked = sorted(best_matches.values(), key=lambda match: match[0], reverse=True)
+        if top_k is not None:
+            ranked = ranked[:top_k]
+
+        docs = self._processing_query_returns([obj for _, obj, _ in ranked])
+        for doc, (_, _, source_query) in zip(docs, ranked):
+            doc.metadata["query"] = source_query
+        return docs
+
+    # Async variants offload the blocking client calls to a worker thread
+    # so they can be awaited from the event loop.
+    async def acheck_collection_existence(self, collection_name : str) -> bool:
+        return await asyncio.to_thread(self.check_collection_existence, collection_name)
+
+    async def aget_collection_version(self, collection_name : str) -> Optional[Tuple[int, Any]]:
+        return await asyncio.to_thread(self.get_collection_version, collection_name)
+
+    async def aquery(self, collection_name : str, alpha : float, top_k : int, query : str) -> List[Document]:
+        return await asyncio.to_thread(self.query, collection_name, alpha, top_k, query)
+
+    async def aquery_params(self, collection_name : str, params : Dict[str, Any], memo : Optional[RetrievalMemo] = None) -> List[Document]:
+        return self._processing_query_returns(await self._ahybrid_objects(collection_name, params, memo))
+
+    async def aquery_many(
+        self,
+        collection_name : str,
+        params_list : List[Dict[str, Any]],
+        top_k : Optional[int] = None,
+        max_concurrency : int = 8,
+        timeout_seconds : Optional[float] = None,
+        memo : Optional[RetrievalMemo] = None
+    ) -> List[Document]:
+        """
+        Async variant of `query_many`; queries still running after `timeout_seconds` are dropped.
+        With a `memo`, identical queries already run (or running) in the same scope are shared.
+        """
+        responses = await gather_bounded(
+            [partial(self._ahybrid_objects, collection_name, params, memo) for params in params_list],
+            max_concurrency=max_concurrency,
+            timeout_seconds=timeout_seconds
+        )
+        return self._merge_query_responses(params_list, responses, top_k)
+
+    async def _ahybrid_objects(
+        self,
+        collection_name : str,
+        params : Dict[str, Any],
+        memo : Optional[RetrievalMemo] = None
+    ) -> List[WeaviateObject]:
+        if memo is None:
+            return await asyncio.to_thread(self._hybrid_objects, collection_name, params)
+
+        key = ("weaviate", collection_name, *self._hybrid_query_key(params))
+        return await memo.aget(key, partial(asyncio.to_thread, self._hybrid_objects, collection_name, params))
     
     def _processing_query_returns(self, query_objs : List[WeaviateObject]) -> List[Document]:
         """
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
-from routers import agentic_rag, download_source, smart_sql
+from fastapi.responses import PlainTextResponse
+from routers import agentic_rag, cache, download_source, smart_sql
 from configs.env_configs import env_config
+from utils.metrics import metrics
+from utils.tracing import RequestTimingMiddleware
 
 app = FastAPI(
     title="RAG API",
@@ -8,9 +11,17 @@ app = FastAPI(
     version="1.0.0"
 )
 
+if env_config.instrumentation_enabled:
+    app.add_middleware(RequestTimingMiddleware)
+
 # Include routers
 app.include_router(agentic_rag.router, prefix="/api/v1", tags=["rag"])
 app.include_router(download_source.router, prefix="/api/v1", tags=["download", "source"])
+app.include_router(cache.router, prefix="/api/v1/cache", tags=["cache"])
 
 if env_config.sql_endpoint_enabled:
-    app.include_router(smart_sql.router, prefix="/api/v1/sql", tags=["smart", "sql"])
\ No newline at end of file
+    app.include_router(smart_sql.router, prefix="/api/v1/sql", tags=["smart", "sql"])
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -6,19 +6,38 @@ from db import (
     get_mongodb_manager,
     get_weaviate_client_manager,
     get_sql_manager,
+    get_page_image_store,
     WeaviateClientManager,
     MongoDBManager,
-    SQLDatabaseManager
+    SQLDatabaseManager,
+    PageImageStore
 )
 
-from ai import get_llm, get_embedding, get_prompt_registry, LLM, Embedding, PromptRegistry
+from ai import (
+    get_llm,
+    get_embedding,
+    get_filename_index,
+    get_reranker,
+    get_answer_cache,
+    get_prompt_registry,
+    LLM,
+    Embedding,
+    FilenameIndex,
+    Reranker,
+    AnswerCache,
+    PromptRegistry
+)
 from workflows import get_agentic_rag_graph, get_smart_sql_graph
 
 WeaviateClientDependency = Annotated[WeaviateClientManager, Depends(get_weaviate_client_manager)]
 MongoDBManagerDependency = Annotated[MongoDBManager, Depends(get_mongodb_manager)]
+PageImageStoreDependency = Annotated[PageImageStore, Depends(get_page_image_store)]
 SQLDatabaseManagerDependency = Annotated[SQLDatabaseManager, Depends(get_sql_manager)]
 LLMDependency = Annotated[LLM, Depends(get_llm)]
 EmbeddingDependency = Annotated[Embedding, Depends(get_embedding)]
+FilenameIndexDependency = Annotated[FilenameIndex, Depends(get_filename_index)]
+RerankerDependency = Annotated[Reranker, Depends(get_reranker)]
+AnswerCacheDependency = Annotated[AnswerCache | None, Depends(get_answer_cache)]
 AgenticRagDependency = Annotated[CompiledStateGraph, Depends(get_agentic_rag_graph)]
 SmartRAGDependency = Annotated[CompiledStateGraph, Depends(get_smart_sql_graph)]
 PromptRegistryDependency = Annotated[PromptRegistry, Depends(get_prompt_registry)]
@@ -1,40 +1,49 @@
+import json
 from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.graph.state import CompiledStateGraph
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional
 import traceback
 
-from schema.request import AgenticRAGQueryRequest
+from schema.request import AgenticRAGQueryRequest, AgenticRAGBatchQueryRequest
 from routers import (
     WeaviateClientDependency,
     MongoDBManagerDependency,
     LLMDependency,
     EmbeddingDependency,
+    FilenameIndexDependency,
+    RerankerDependency,
     AgenticRagDependency,
+    AnswerCacheDependency,
     PromptRegistryDependency
 )
+from ai import AnswerCache, make_scope
+from ai.embedding_cache import normalize_text
+from db import WeaviateClientManager, MongoDBManager, RetrievalMemo
+from workflows.nodes.sourcing import CitationRewriter, int_to_superscript, source_link
+from workflows.nodes.retriever import embed_keywords
+from configs.env_configs import env_config
+from utils.concurrency import as_completed_bounded
 
 from utils.logger import logger
 
 router = APIRouter()
 
-@router.post("/query")
-async def query(
-    weaviate_manager : WeaviateClientDependency,
-    mongodb_manager : MongoDBManagerDependency,
-    llm : LLMDependency,
-    embedding : EmbeddingDependency,
-    agentic_graph : AgenticRagDependency,
-    prompt_registry : PromptRegistryDependency,
-    request: AgenticRAGQueryRequest
+async def validate_resources(
+    weaviate_manager : WeaviateClientManager,
+    mongodb_manager : MongoDBManager,
+    request : AgenticRAGQueryRequest,
+    endpoint : str
 ):
+    if not await weaviate_manager.acheck_collection_existence(request.weaviate_collection):
 
-    if not weaviate_manager.check_collection_existence(request.weaviate_collection):
-        
         logger.warning(
             "Invalid weaviate collection",
             extra={
                 "collection": request.weaviate_collection,
-                "endpoint": "/api/v1/query",
+                "endpoint": endpoint,
             }
         )
 
@@ -46,10 +55,10 @@ async def query(
             }
         )
 
-    if not mongodb_manager.check_db_existence(request.mongodb_dbname) or \
-        not mongodb_manager.check_collection_existence(request.mongodb_dbname, request.mongodb_chunk_collection) or \
-        not mongodb_manager.check_collection_existence(request.mongodb_dbname, request.mongodb_files_collection) or \
-        not mongodb_manager.check_collection_existence(request.mongodb_dbname, request.mongodb_page_collection):
+    if not await mongodb_manager.acheck_db_existence(request.mongodb_dbname) or \
+        not await mongodb_manager.acheck_collection_existence(request.mongodb_dbname, request.mongodb_chunk_collection) or \
+        not await mongodb_manager.acheck_collection_existence(request.mongodb_dbname, request.mongodb_files_collection) or \
+        not await mongodb_manager.acheck_collection_existence(request.mongodb_dbname, request.mongodb_page_collection):
 
         logger.warning(
             "Invalid mongodb db or collections",
@@ -58,7 +67,7 @@ async def query(
                 "files_collection": request.mongodb_files_collection,
                 "chunk_collection": request.mongodb_chunk_collection,
                 "page_collection": request.mongodb_page_collection,
-                "endpoint": "/api/v1/query",
+                "endpoint": endpoint,
             }
         )
 
@@ -77,41 +86,380 @@ async def query(
             }
         )
 
+async def answer_cache_scope(
+    answer_cache : Optional[AnswerCache],
+    weaviate_manager : WeaviateClientManager,
+    mongodb_manager : MongoDBManager,
+    request : AgenticRAGQueryRequest
+):
+    """Answer cache scope of a request, or None when answers must not be cached."""
+    if answer_cache is None:
+        return None
+
+    # Without a Weaviate update marker a same-count re-ingestion would go unnoticed: don't cache
+    weaviate_version = await weaviate_manager.aget_collection_version(request.weaviate_collection)
+    if weaviate_version is None:
+        return None
+
+    return make_scope(
+        weaviate_collection=request.weaviate_collection,
+        weaviate_version=weaviate_version,
+        mongodb_dbname=request.mongodb_dbname,
+        mongodb_files_collection=request.mongodb_files_collection,
+        mongodb_page_collection=request.mongodb_page_collection,
+        mongodb_chunk_collection=request.mongodb_chunk_collection,
+        mongodb_files_version=await mongodb_manager.aget_collection_version(request.mongodb_dbname, request.mongodb_files_collection),
+        mongodb_chunk_version=await mongodb_manager.aget_collection_version(request.mongodb_dbname, request.mongodb_chunk_collection),
+        keywords=normalize_text(request.keywords),
+        use_file_filtering=request.use_file_filtering,
+        use_basic_vector_search=request.use_basic_vector_search,
+        top_k=request.top_k,
+        return_docs=request.return_docs
+    )
+
+def build_init_state(request : AgenticRAGQueryRequest) -> Dict[str, Any]:
+    return {
+        "messages": [
+            HumanMessage(content=request.message),
+            AIMessage(content=request.keywords)
+        ],
+        "vector_docs" : [],
+        "full_text_docs" : [],
+        "fused_docs" : [],
+        "sourcing_vector_search" : {},
+        "sourcing_full_text_search" : {},
+        "sourcing_fused_search" : {},
+        "failed_generations" : [],
+        "filtered_filenames" : [],
+        "rewrite_count" : 0,
+        "top_k" : request.top_k,
+        "return_docs": request.return_docs,
+        "weaviate_collection" : request.weaviate_collection,
+        "mongodb_dbname" : request.mongodb_dbname,
+        "mongodb_files_collection" : request.mongodb_files_collection,
+        "mongodb_page_collection" : request.mongodb_page_collection,
+        "mongodb_chunk_collection" : request.mongodb_chunk_collection
+    }
+
+def build_runtime_context(
+    request : AgenticRAGQueryRequest,
+    clients : Dict[str, Any],
+    retrieval_memo : Optional[RetrievalMemo] = None
+) -> Dict[str, Any]:
+    """
+    `clients` holds the shared managers and models (weaviate_manager, mongodb_manager, llm, embedding, filename_index, reranker, prompt_registry).
+    Without a `retrieval_memo` (batch scope), the request gets its own, shared by its keyword retries.
+    """
+    return {
+        **clients,
+        "use_file_filtering" : request.use_file_filtering,
+        "use_basic_vector_search" : request.use_basic_vector_search,
+        "retrieval_memo" : retrieval_memo or RetrievalMemo()
+    }
+
+def sse_event(event : str, data : Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def summarize_update(update : Any) -> Dict[str, Any]:
+    """Small, JSON-friendly view of a node's state update for progress events."""
+    if not isinstance(update, dict):
+        return {}
+
+    summary = {}
+    for message in update.get("messages", []):
+        if isinstance(message, AIMessage) and "path" not in message.additional_kwargs:
+            summary["keywords"] = message.content
+    if "filtered_filenames" in update:
+        summary["filenames"] = update["filtered_filenames"]
+    for key in ("vector_docs", "full_text_docs", "fused_docs"):
+        if key in update:
+            summary[key] = len(update[key])
+    return summary
+
+async def stream_agentic_rag(
+    agentic_graph : CompiledStateGraph,
+    init_state : Dict[str, Any],
+    runtime_context : Dict[str, Any],
+    request : AgenticRAGQueryRequest,
+    answer_cache : Optional[AnswerCache],
+    cache_scope : Any
+) -> AsyncIterator[str]:
+    """
+    Translate graph events into server-sent events
+    - `progress` when a node starts / finishes, with keywords, filenames and document counts
+    - `sources` when a generation node announces its snippets, `token` for its rewritten output
+    - `done` with the final answer (same text as /query), `error` if the graph fails
+    """
+    # Generation node -> (path, citation rewriter), learned from their `sources` events
+    rewriters : Dict[str, Any] = {}
+    final_answer = None
+    degraded = False
+
+    try:
+        async for event in agentic_graph.astream_events(init_state, context=runtime_context, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node in rewriters:
+                path, rewriter = rewriters[node]
+                text = rewriter.feed(event["data"]["chunk"].content)
+                if text:
+                    yield sse_event("token", {"path": path, "text": text})
+
+            elif kind == "on_custom_event" and event["name"] == "sources":
+                path, sourcing = event["data"]["path"], event["data"]["sourcing"]
+                rewriters[node] = (path, CitationRewriter(sourcing))
+                yield sse_event("sources", {
+                    "path": path,
+                    "sources": [
+                        {
+                            "index": idx,
+                            "superscript": int_to_superscript(idx),
+                            "link": source_link(src_meta, request.mongodb_dbname, request.mongodb_page_collection)
+                        }
+                        for idx, src_meta in sourcing.items()
+                    ]
+                })
+
+            elif kind == "on_chain_start" and event["name"] == node:
+                yield sse_event("progress", {"node": node, "status": "started"})
+
+            elif kind == "on_chain_end" and event["name"] == node:
+                if node in rewriters:
+                    path, rewriter = rewriters[node]
+                    text = rewriter.flush()
+                    if text:
+                        yield sse_event("token", {"path": path, "text": text})
+                yield sse_event("progress", {"node": node, "status": "finished", **summarize_update(event["data"].get("output"))})
+
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                final_answer = event["data"]["output"]["messages"][-1].content
+                degraded = bool(event["data"]["output"].get("failed_generations"))
+
+    except Exception as e:
+        error = traceback.format_exc()
+        logger.error(f"Error streaming query: {str(error)}")
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    if final_answer is not None and cache_scope is not None and not degraded:
+        await answer_cache.aset(cache_scope, request.message, final_answer)
+    yield sse_event("done", {"answer": final_answer})
+
+def batch_embedding_texts(requests : List[AgenticRAGQueryRequest]) -> List[str]:
+    """Texts the retrievers will embed that are already known before the graph runs (client keywords and questions)."""
+    texts = []
+    for request in requests:
+        if not request.keywords:
+            continue
+        keywords = [*(keyword.strip() for keyword in request.keywords.split(",") if keyword.strip()), request.message]
+        if request.use_basic_vector_search:
+            texts.append(" ".join(keywords))
+        else:
+            texts.extend(keywords)
+    return list(dict.fromkeys(texts))
+
+async def run_batch_item(
+    index : int,
+    request : AgenticRAGQueryRequest,
+    agentic_graph : CompiledStateGraph,
+    clients : Dict[str, Any],
+    answer_cache : Optional[AnswerCache],
+    retrieval_memo : RetrievalMemo
+) -> Dict[str, Any]:
+    try:
+        await validate_resources(clients["weaviate_manager"], clients["mongodb_manager"], request, "/api/v1/query/batch")
+
+        cache_scope = await answer_cache_scope(answer_cache, clients["weaviate_manager"], clients["mongodb_manager"], request)
+        if cache_scope is not None:
+            cached_answer = await answer_cache.aget(cache_scope, request.message)
+            if cached_answer is not None:
+                return {"index": index, "status": status.HTTP_201_CREATED, "answer": cached_answer, "cached": True}
+
+        response = await agentic_graph.ainvoke(
+            build_init_state(request),
+            context=build_runtime_context(request, clients, retrieval_memo)
+        )
+
+        answer = response["messages"][-1].content
+        if cache_scope is not None and not response.get("failed_generations"):
+            await answer_cache.aset(cache_scope, request.message, answer)
+        return {"index": index, "status": status.HTTP_201_CREATED, "answer": answer}
+
+    except HTTPException as e:
+        return {"index": index, "status": e.status_code, "error": e.detail}
+
+    except Exception as e:
+        error = traceback.format_exc()
+        logger.error(f"Error processing batch query {index}: {str(error)}")
+        return {"index": index, "status": status.HTTP_500_INTERNAL_SERVER_ERROR, "error": str(e)}
+
+async def run_query_batch(
+    requests : List[AgenticRAGQueryRequest],
+    agentic_graph : CompiledStateGraph,
+    clients : Dict[str, Any],
+    answer_cache : Optional[AnswerCache] = None,
+    max_concurrency : Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run several queries through the agentic graph and yield each result as soon as it finishes
+    - Results are `{"index", "status", "answer"}` or `{"index", "status", "error"}`, `index` being the position in `requests`
+    - At most `max_concurrency` graphs run at once (BATCH_MAX_CONCURRENCY by default)
+    - Known keywords and questions are embedded in one call up front
+    - Identical keyword embeddings and per-keyword searches are run once for the whole batch
+    """
+    max_concurrency = min(max_concurrency or env_config.batch_max_concurrency, env_config.batch_max_concurrency)
+    retrieval_memo = RetrievalMemo()
+
+    texts = batch_embedding_texts(requests)
+    if texts:
+        try:
+            await embed_keywords(clients["embedding"], retrieval_memo, texts)
+        except Exception as e:
+            logger.warning(f"Batch embedding prewarm failed, queries will embed on their own: {str(e)}")
+
+    async for result in as_completed_bounded(
+        [partial(run_batch_item, index, request, agentic_graph, clients, answer_cache, retrieval_memo) for index, request in enumerate(requests)],
+        max_concurrency=max_concurrency
+    ):
+        yield result
+
+    logger.info(f"Batch of {len(requests)} queries done, shared retrievals : {retrieval_memo.stats()}")
+
+@router.post("/query")
+async def query(
+    weaviate_manager : WeaviateClientDependency,
+    mongodb_manager : MongoDBManagerDependency,
+    llm : LLMDependency,
+    embedding : EmbeddingDependency,
+    filename_index : FilenameIndexDependency,
+    reranker : RerankerDependency,
+    agentic_graph : AgenticRagDependency,
+    answer_cache : AnswerCacheDependency,
+    prompt_registry : PromptRegistryDependency,
+    request: AgenticRAGQueryRequest
+):
+
+    await validate_resources(weaviate_manager, mongodb_manager, request, "/api/v1/query")
+
     try:
-        init_state = {
-            "messages": [
-                HumanMessage(content=request.message),
-                AIMessage(content=request.keywords)
-            ],
-            "vector_docs" : [],
-            "full_text_docs" : [],
-            "sourcing_vector_search" : {},
-            "sourcing_full_text_search" : {},
-            "filtered_filenames" : [],
-            "top_k" : request.top_k,
-            "return_docs": request.return_docs,
-            "weaviate_collection" : request.weaviate_collection,
-            "mongodb_dbname" : request.mongodb_dbname,
-            "mongodb_files_collection" : request.mongodb_files_collection,
-            "mongodb_page_collection" : request.mongodb_page_collection,
-            "mongodb_chunk_collection" : request.mongodb_chunk_collection
-        }
-
-        runtime_context = {
+        cache_scope = await answer_cache_scope(answer_cache, weaviate_manager, mongodb_manager, request)
+        if cache_scope is not None:
+            cached_answer = await answer_cache.aget(cache_scope, request.message)
+            if cached_answer is not None:
+                logger.info("Answer served from cache")
+                return Response(content=cached_answer, status_code=status.HTTP_201_CREATED, headers={"X-Answer-Cache": "hit"})
+
+        init_state = build_init_state(request)
+
+        runtime_context = build_runtime_context(request, {
             "weaviate_manager" : weaviate_manager,
             "mongodb_manager" : mongodb_manager,
             "llm" : llm,
             "embedding" : embedding,
-            "use_file_filtering" : request.use_file_filtering,
-            "use_basic_vector_search" : request.use_basic_vector_search,
+            "filename_index" : filename_index,
+            "reranker" : reranker,
             "prompt_registry" : prompt_registry
-        }
+        })
+
+        response = await agentic_graph.ainvoke(init_state, context=runtime_context)
+        logger.info(f"Lenght Messages : {len(response['messages'])}")
+
+        answer = response["messages"][-1].content
+        if cache_scope is not None and not response.get("failed_generations"):
+            await answer_cache.aset(cache_scope, request.message, answer)
+        return Response(content=answer, status_code=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        error = traceback.format_exc()
+        logger.error(f"Error processing query: {str(error)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query/stream")
+async def query_stream(
+    weaviate_manager : WeaviateClientDependency,
+    mongodb_manager : MongoDBManagerDependency,
+    llm : LLMDependency,
+    embedding : EmbeddingDependency,
+    filename_index : FilenameIndexDependency,
+    reranker : RerankerDependency,
+    agentic_graph : AgenticRagDependency,
+    answer_cache : AnswerCacheDependency,
+    prompt_registry : PromptRegistryDependency,
+    request: AgenticRAGQueryRequest
+):
 
-        response = agentic_graph.invoke(init_state, context=runtime_context)
-        logger.info(f"Lenght Messages : {len(response["messages"])}")
-        return Response(content=response["messages"][-1].content, status_code=status.HTTP_201_CREATED)
-        
+    await validate_resources(weaviate_manager, mongodb_manager, request, "/api/v1/query/stream")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    try:
+        cache_scope = await answer_cache_scope(answer_cache, weaviate_manager, mongodb_manager, request)
+        cached_answer = await answer_cache.aget(cache_scope, request.message) if cache_scope is not None else None
     except Exception as e:
         error = traceback.format_exc()
         logger.error(f"Error processing query: {str(error)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if cached_answer is not None:
+        logger.info("Answer served from cache")
+
+        async def cached_events():
+            yield sse_event("done", {"answer": cached_answer})
+
+        return StreamingResponse(cached_events(), media_type="text/event-stream", headers={**headers, "X-Answer-Cache": "hit"})
+
+    runtime_context = build_runtime_context(request, {
+        "weaviate_manager" : weaviate_manager,
+        "mongodb_manager" : mongodb_manager,
+        "llm" : llm,
+        "embedding" : embedding,
+        "filename_index" : filename_index,
+        "reranker" : reranker,
+        "prompt_registry" : prompt_registry
+    })
+
+    return StreamingResponse(
+        stream_agentic_rag(agentic_graph, build_init_state(request), runtime_context, request, answer_cache, cache_scope),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@router.post("/query/batch")
+async def query_batch(
+    weaviate_manager : WeaviateClientDependency,
+    mongodb_manager : MongoDBManagerDependency,
+    llm : LLMDependency,
+    embedding : EmbeddingDependency,
+    filename_index : FilenameIndexDependency,
+    reranker : RerankerDependency,
+    agentic_graph : AgenticRagDependency,
+    answer_cache : AnswerCacheDependency,
+    prompt_registry : PromptRegistryDependency,
+    request: AgenticRAGBatchQueryRequest
+):
+
+    if len(request.requests) > env_config.batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error_code": "BATCH_TOO_LARGE",
+                "max_size": env_config.batch_max_size
+            }
+        )
+
+    clients = {
+        "weaviate_manager" : weaviate_manager,
+        "mongodb_manager" : mongodb_manager,
+        "llm" : llm,
+        "embedding" : embedding,
+        "filename_index" : filename_index,
+        "reranker" : reranker,
+        "prompt_registry" : prompt_registry
+    }
+
+    async def ndjson_lines():
+        async for result in run_query_batch(request.requests, agentic_graph, clients, answer_cache, request.max_concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,41 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, status
+
+from routers import WeaviateClientDependency, MongoDBManagerDependency, PageImageStoreDependency, AnswerCacheDependency
+from schema.request import CacheInvalidationRequest
+from utils.logger import logger
+
+router = APIRouter()
+
+@router.post("/invalidate")
+async def invalidate(
+    weaviate_manager : WeaviateClientDependency,
+    mongodb_manager : MongoDBManagerDependency,
+    page_image_store : PageImageStoreDependency,
+    answer_cache : AnswerCacheDependency,
+
+    request : CacheInvalidationRequest
+):
+    """
+    Called by ingestion jobs after writing to a collection, so cached search results, answers
+    and page images are dropped right away instead of when the collection version is next polled.
+    Without `mongodb_collection`, every collection of `mongodb_dbname` is invalidated.
+    """
+    if request.weaviate_collection is None and request.mongodb_dbname is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide weaviate_collection and/or mongodb_dbname")
+
+    dropped = {"retrieval": 0, "answers": 0, "pages": 0}
+
+    if request.weaviate_collection is not None:
+        dropped["retrieval"] += weaviate_manager.invalidate_collection(request.weaviate_collection)
+        if answer_cache is not None:
+            dropped["answers"] += answer_cache.invalidate(weaviate_collection=request.weaviate_collection)
+
+    if request.mongodb_dbname is not None:
+        dropped["retrieval"] += mongodb_manager.invalidate_collection(request.mongodb_dbname, request.mongodb_collection)
+        dropped["pages"] += await asyncio.to_thread(page_image_store.invalidate, request.mongodb_dbname, request.mongodb_collection)
+        if answer_cache is not None:
+            dropped["answers"] += answer_cache.invalidate(mongodb_dbname=request.mongodb_dbname)
+
+    logger.info(f"Cache invalidation {request.model_dump(exclude_none=True)}: {dropped}")
+    return {"dropped": dropped}
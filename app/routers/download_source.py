@@ -1,35 +1,122 @@
+import asyncio
+import re
 import traceback
 import urllib
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from gridfs import GridOut
+from typing import AsyncIterator, Optional, Tuple
 
-from routers import MongoDBManagerDependency
+from routers import MongoDBManagerDependency, PageImageStoreDependency
+from configs.env_configs import env_config
 from utils.logger import logger
 
 router = APIRouter()
 
+def parse_range_header(range_header : Optional[str], file_size : int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=start-end` range into inclusive offsets.
+    Returns None when no usable range is requested (missing, malformed or multi-range),
+    raises 416 for unsatisfiable ranges.
+    """
+    if not range_header:
+        return None
+
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last `end` bytes
+        start, end = max(file_size - int(end), 0), file_size - 1
+    else:
+        start, end = int(start), min(int(end), file_size - 1) if end else file_size - 1
+
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+def as_utc(value : datetime) -> datetime:
+    # pymongo returns naive datetimes that are already in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def gridfs_etag(grid_out : GridOut) -> str:
+    if grid_out.md5:
+        return f'"{grid_out.md5}"'
+    upload_date = as_utc(grid_out.upload_date).timestamp() if grid_out.upload_date else 0
+    return f'"{grid_out._id}-{int(upload_date * 1000)}-{grid_out.length}"'
+
+def etag_matches(if_none_match : Optional[str], etag : str) -> bool:
+    """
+    Weak comparison of an `If-None-Match` header against `etag`:
+    the header may list several tags (`"a", "b"`) or `*`, and a `W/` prefix is ignored
+    (proxies weaken the tags of responses they compress).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+async def iterate_gridfs(grid_out : GridOut, start : int, end : int) -> AsyncIterator[bytes]:
+    """Yield GridFS chunks between inclusive offsets, reading each chunk in a worker thread."""
+    try:
+        if start:
+            await asyncio.to_thread(grid_out.seek, start)
+
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(grid_out.readchunk)
+            if not chunk:
+                break
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        grid_out.close()
+
 @router.get("/download/{db_name}/{collection_name}/{filename}")
-async def download_file(mongo_db : MongoDBManagerDependency, db_name : str, collection_name, filename: str):
+async def download_file(mongo_db : MongoDBManagerDependency, request : Request, db_name : str, collection_name, filename: str):
     """
     Retrieves a file from MongoDB based on the filename 
-    and streams it back to the user.
+    and streams it back to the user chunk by chunk.
+    Supports `Range` requests and `If-None-Match` revalidation.
     """
-    if not mongo_db.check_db_existence(db_name) or not mongo_db.check_collection_existence(db_name, collection_name):
+    if not await mongo_db.acheck_db_existence(db_name) or not await mongo_db.acheck_collection_existence(db_name, collection_name):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Database '{db_name}' or Collection '{collection_name}' not found in the database."
         )
 
     try:
-        file_size, _, content_stream = mongo_db.get_file_from_gridfs_by_filename(db_name, collection_name, filename)
-        def file_iterator():
-            chunk_size = 4096
-            while True:
-                chunk = content_stream.read(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
-            content_stream.close()
+        grid_out = await mongo_db.aopen_gridfs_file_by_filename(db_name, collection_name, filename)
+        file_size = grid_out.length
+        etag = gridfs_etag(grid_out)
+
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+        }
+        if grid_out.upload_date:
+            headers["Last-Modified"] = format_datetime(as_utc(grid_out.upload_date), usegmt=True)
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            grid_out.close()
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), file_size)
+        except HTTPException:
+            grid_out.close()
+            raise
+        start, end = byte_range if byte_range else (0, file_size - 1)
 
         content_type = "application/octet-stream"
         if filename.lower().endswith('.txt'):
@@ -41,19 +128,26 @@ async def download_file(mongo_db : MongoDBManagerDependency, db_name : str, coll
 
         encoded_filename = encoded_filename = urllib.parse.quote(filename)
 
-        headers = {
-            'Content-Disposition': f'attachment;  filename*=UTF-8\'\'{encoded_filename}',
-            'Content-Length': file_size
-        }
+        headers['Content-Disposition'] = f'attachment;  filename*=UTF-8\'\'{encoded_filename}'
+        headers['Content-Length'] = str(end - start + 1)
+
+        status_code = status.HTTP_200_OK
+        if byte_range:
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
 
         return StreamingResponse(
-            file_iterator(),
+            iterate_gridfs(grid_out, start, end),
+            status_code=status_code,
             media_type=content_type,
             headers=headers
         )
     
     except HTTPException:
         raise
+
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
         
     except Exception as e:
         error = traceback.format_exc()
@@ -63,6 +157,8 @@ async def download_file(mongo_db : MongoDBManagerDependency, db_name : str, coll
 @router.get("/download/{db_name}/{collection_name}/{filename}/{file_id}/{chunk_index}")
 async def download_page(
     mongo_db : MongoDBManagerDependency,
+    page_image_store : PageImageStoreDependency,
+    request : Request,
     db_name : str, 
     collection_name, 
     filename : str, 
@@ -70,26 +166,25 @@ async def download_page(
     chunk_index : int
 ):
     """
-    Retrieves a file from MongoDB based on the filename 
-    and streams it back to the user.
+    Retrieves a page image from MongoDB based on the fileId and chunk index
+    and sends it back to the user. Decoded images are cached and revalidated with ETags.
     """
-    if not mongo_db.check_db_existence(db_name) or not mongo_db.check_collection_existence(db_name, collection_name):
+    if not await mongo_db.acheck_db_existence(db_name) or not await mongo_db.acheck_collection_existence(db_name, collection_name):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Database '{db_name}' or Collection '{collection_name}' not found in the database."
         )
 
     try:
-        search_record = {"fileId" : file_id, "chunk_index" : chunk_index}
-        file_size, content_stream = mongo_db.get_file_from_collection(db_name, collection_name, search_record)
-        def file_iterator():
-            chunk_size = 4096
-            while True:
-                chunk = content_stream.read(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
-            content_stream.close()
+        page_image = await page_image_store.aget(db_name, collection_name, file_id, chunk_index)
+
+        headers = {
+            "ETag": page_image.etag,
+            "Cache-Control": f"public, max-age={env_config.page_image_max_age_seconds}",
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), page_image.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
         filename = f"{filename}_page_{chunk_index}.jpg"
         content_type = "application/octet-stream"
@@ -98,21 +193,21 @@ async def download_page(
 
         encoded_filename = encoded_filename = urllib.parse.quote(filename)
 
-        headers = {
-            'Content-Disposition': f'inline; filename*=UTF-8\'\'{encoded_filename}',
-            'Content-Length': file_size
-        }
+        headers['Content-Disposition'] = f'inline; filename*=UTF-8\'\'{encoded_filename}'
 
-        return StreamingResponse(
-            file_iterator(),
+        return Response(
+            content=page_image.content,
             media_type=content_type,
             headers=headers
         )
     
     except HTTPException:
         raise
+
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
         
     except Exception as e:
         error = traceback.format_exc()
         logger.error(f"Error downloading file: {str(error)}")
-        raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
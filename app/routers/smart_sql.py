@@ -30,7 +30,7 @@ async def query(
             "prompt_registry" : prompt_registry
         }
 
-        response = smart_sql_graph.invoke(init_state, context=runtime_context)
+        response = await smart_sql_graph.ainvoke(init_state, context=runtime_context)
 
         return Response(content=response["messages"][-1].content, status_code=status.HTTP_201_CREATED)
         
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class AgenticRAGQueryRequest(BaseModel):
     message: str
-    keywords : str
+    keywords : str = ""
     use_local_embedding : bool = True
     use_file_filtering : bool = True
     use_basic_vector_search : bool = True
@@ -14,5 +15,14 @@ class AgenticRAGQueryRequest(BaseModel):
     mongodb_page_collection : str = "pdf_pages"
     mongodb_chunk_collection : str = "file_chunks"
 
+class AgenticRAGBatchQueryRequest(BaseModel):
+    requests : List[AgenticRAGQueryRequest]
+    max_concurrency : Optional[int] = None
+
 class GeneralQueryRequest(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+
+class CacheInvalidationRequest(BaseModel):
+    weaviate_collection : Optional[str] = None
+    mongodb_dbname : Optional[str] = None
+    mongodb_collection : Optional[str] = None
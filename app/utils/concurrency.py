@@ -0,0 +1,67 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+from utils.logger import logger
+
+T = TypeVar("T")
+
+async def gather_bounded(
+    factories : Sequence[Callable[[], Awaitable[T]]],
+    max_concurrency : int,
+    timeout_seconds : Optional[float] = None
+) -> List[Optional[T]]:
+    """
+    Run the awaitables produced by `factories` with at most `max_concurrency` in flight.
+
+    Results keep the order of `factories`. Anything still running after `timeout_seconds`
+    is cancelled and yields None; exceptions from finished calls are re-raised.
+    """
+    if not factories:
+        return []
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(factory : Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(factory)) for factory in factories]
+    done, pending = await asyncio.wait(tasks, timeout=timeout_seconds or None)
+
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning(f"{len(pending)}/{len(tasks)} calls did not finish within {timeout_seconds}s and were cancelled")
+
+    return [task.result() if task in done else None for task in tasks]
+
+async def as_completed_bounded(
+    factories : Sequence[Callable[[], Awaitable[T]]],
+    max_concurrency : int
+) -> AsyncIterator[T]:
+    """
+    Run the awaitables produced by `factories` with at most `max_concurrency` in flight
+    and yield each result as soon as it is ready (completion order, not input order).
+
+    Exceptions are re-raised when their call completes. Calls still pending when the
+    consumer stops iterating (e.g. a client disconnect) are cancelled.
+    """
+    if not factories:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(factory : Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(factory)) for factory in factories]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,157 @@
+import bisect
+from threading import Lock
+from typing import Dict, List, Sequence, Tuple, Union
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Counter:
+
+    """
+    Monotonic counter with optional labels
+    - `inc(value, **labels)` adds to the series of that label set
+    - Rendered in the Prometheus text exposition format
+    """
+
+    def __init__(self, name : str, documentation : str, labelnames : Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values : Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, value : float = 1, **labels : str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels : str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+
+    """
+    Cumulative histogram with optional labels
+    - `observe(value, **labels)` counts the value in the first bucket whose upper bound is >= value
+    - Rendered as `_bucket{le=...}`, `_sum` and `_count` series in the Prometheus text format
+    """
+
+    def __init__(self, name : str, documentation : str, labelnames : Tuple[str, ...] = (), buckets : Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series : Dict[Tuple[str, ...], list] = {}
+        self._lock = Lock()
+
+    def observe(self, value : float, **labels : str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[Tuple[int, ...], float, int]]:
+        """Copy of every series: label values -> (per-bucket counts, last one is +Inf; sum; count)."""
+        with self._lock:
+            return {key: (tuple(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        labelnames = (*self.labelnames, "le")
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{format_labels(labelnames, (*key, str(bound)))} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {count}")
+        return lines
+
+def format_labels(labelnames : Tuple[str, ...], values : Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(labelnames, values))
+    return f"{{{pairs}}}"
+
+def escape_label(value : str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class MetricsRegistry:
+
+    """
+    Process-wide metrics, exposed on GET /metrics
+    - Metrics are created once by name and shared by every caller
+    """
+
+    def __init__(self):
+        self._metrics : Dict[str, Union[Counter, Histogram]] = {}
+        self._lock = Lock()
+
+    def counter(self, name : str, documentation : str, labelnames : Tuple[str, ...] = ()) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, labelnames)
+            return self._metrics[name]
+
+    def histogram(self, name : str, documentation : str, labelnames : Tuple[str, ...] = (), buckets : Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+metrics = MetricsRegistry()
+
+keyword_source_total = metrics.counter(
+    "agentic_rag_keyword_source_total",
+    "Requests by where their search keywords came from (client or llm)",
+    ("source",)
+)
+
+# Recorded only when INSTRUMENTATION_ENABLED is set
+node_duration_seconds = metrics.histogram(
+    "workflow_node_duration_seconds",
+    "Workflow node duration by outcome (ok, error or cancelled)",
+    ("workflow", "node", "outcome")
+)
+
+llm_request_duration_seconds = metrics.histogram(
+    "agentic_rag_llm_request_duration_seconds",
+    "LLM completion duration by outcome",
+    ("model", "outcome")
+)
+
+llm_time_to_first_token_seconds = metrics.histogram(
+    "agentic_rag_llm_time_to_first_token_seconds",
+    "Time from sending an LLM request to its first streamed token",
+    ("model",)
+)
+
+llm_tokens_total = metrics.counter(
+    "agentic_rag_llm_tokens_total",
+    "LLM tokens reported by the provider, by kind (prompt or completion)",
+    ("model", "kind")
+)
+
+http_request_duration_seconds = metrics.histogram(
+    "agentic_rag_http_request_duration_seconds",
+    "HTTP request duration by route and status, until the response is fully sent",
+    ("method", "path", "status")
+)
@@ -0,0 +1,80 @@
+import bisect
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from utils.logger import logger
+
+FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class TokenCounter:
+
+    """
+    Local token counting for prompt budgets
+    - Uses the tiktoken encoding `encoding_name` (set TIKTOKEN_CACHE_DIR to ship it offline)
+    - Falls back to counting words and punctuation when the encoding can't be loaded
+    - `trim` cuts long text to a token window centered on the densest keyword hits
+    """
+
+    def __init__(self, encoding_name : str = "cl100k_base"):
+        self.encoding = None
+        try:
+            import tiktoken
+            self.encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"Tiktoken encoding {encoding_name} unavailable, approximating token counts with words: {str(e)}")
+
+    def count(self, text : str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(FALLBACK_TOKEN_PATTERN.findall(text))
+
+    def trim(self, text : str, max_tokens : int, terms : Optional[List[str]] = None) -> str:
+        """Return at most `max_tokens` tokens of `text`, centered on the keyword hits, with `...` at cut ends."""
+        offsets = self._token_offsets(text)
+        if len(offsets) <= max_tokens:
+            return text
+
+        start = self._best_window_start(text, offsets, max_tokens, terms or [])
+        end = start + max_tokens
+
+        start_char = offsets[start]
+        end_char = offsets[end] if end < len(offsets) else len(text)
+        snippet = text[start_char:end_char].strip()
+        return f"{'... ' if start > 0 else ''}{snippet}{' ...' if end < len(offsets) else ''}"
+
+    def _token_offsets(self, text : str) -> List[int]:
+        """Character offset where each token starts."""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            _, offsets = self.encoding.decode_with_offsets(tokens)
+            return offsets
+        return [match.start() for match in FALLBACK_TOKEN_PATTERN.finditer(text)]
+
+    def _best_window_start(self, text : str, offsets : List[int], max_tokens : int, terms : List[str]) -> int:
+        lowered = text.lower()
+        hits = sorted(
+            bisect.bisect_right(offsets, match.start()) - 1
+            for term in {term.strip().lower() for term in terms if len(term.strip()) > 1}
+            for match in re.finditer(re.escape(term), lowered)
+        )
+        if not hits:
+            return 0
+
+        # Slide over hit positions and keep the window that covers the most hits
+        best_start, best_count = hits[0], 0
+        for i, hit in enumerate(hits):
+            count = bisect.bisect_left(hits, hit + max_tokens) - i
+            if count > best_count:
+                best_start, best_count = hit, count
+
+        # Center the covered hits inside the window
+        covered = hits[bisect.bisect_left(hits, best_start):bisect.bisect_left(hits, best_start + max_tokens)]
+        start = (covered[0] + covered[-1]) // 2 - max_tokens // 2
+        return max(0, min(start, len(offsets) - max_tokens))
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(encoding_name : str = "cl100k_base") -> TokenCounter:
+    """Shared counter per encoding; the configured one is built at startup by `ai`."""
+    return TokenCounter(encoding_name)
@@ -0,0 +1,76 @@
+import time
+import uuid
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from utils.metrics import http_request_duration_seconds
+
+# Filled by instrumented workflow nodes while a request is being served
+node_timings : ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("node_timings", default=None)
+
+def server_timing(total_seconds : float, timings : List[Tuple[str, float]]) -> str:
+    entries = [f"total;dur={total_seconds * 1000:.1f}"]
+    entries.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+    return ", ".join(entries)
+
+def route_template(scope) -> str:
+    """Matched route as a template (`/api/v1/download/{file_name}`), so metric labels stay bounded."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+
+    # Routes of included routers may not carry the prefix: recover it from the concrete path
+    try:
+        rendered = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    return path[:len(path) - len(rendered)] + template if path.endswith(rendered) else template
+
+class RequestTimingMiddleware:
+
+    """
+    ASGI middleware tracing every HTTP request
+    - Reuses the caller's X-Request-ID or generates one, and echoes it on the response
+    - Adds a Server-Timing header with the total and the workflow nodes finished before the headers were sent
+      (all of them for /query, none yet for streaming endpoints)
+    - Records the request duration by route template and status
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        current_id = incoming.decode("latin-1") if incoming else uuid.uuid4().hex
+        timings : List[Tuple[str, float]] = []
+        timings_token = node_timings.set(timings)
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", current_id.encode("latin-1")))
+                headers.append((b"server-timing", server_timing(time.perf_counter() - started_at, timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started_at,
+                method=scope["method"],
+                path=route_template(scope),
+                status=str(status_code)
+            )
+            node_timings.reset(timings_token)
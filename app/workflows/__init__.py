@@ -3,6 +3,7 @@ from langgraph.graph.state import CompiledStateGraph
 from workflows.graph import WorkflowGraphBuilder
 from workflows.configs.agentic_rag import AGENTIC_RAG_WORKFLOW
 from workflows.configs.smart_sql import SMART_SQL_WORKFLOW
+from configs.env_configs import env_config
 from .states import (
     AgenticRAGState,
     AgenticRAGContextSchema,
@@ -13,13 +14,17 @@ from .states import (
 agentic_rag_graph = WorkflowGraphBuilder(
     state_schema=AgenticRAGState, 
     context_schema=AgenticRAGContextSchema,
-    workflow_config=AGENTIC_RAG_WORKFLOW
+    workflow_config=AGENTIC_RAG_WORKFLOW,
+    instrument=env_config.instrumentation_enabled,
+    name="agentic_rag"
 ).build()
 
 smart_sql_graph = WorkflowGraphBuilder(
     state_schema=SmartSQLPipelineState, 
     context_schema=SmartSQLPipelineContextSchema,
-    workflow_config=SMART_SQL_WORKFLOW
+    workflow_config=SMART_SQL_WORKFLOW,
+    instrument=env_config.instrumentation_enabled,
+    name="smart_sql"
 ).build()
 
 def get_agentic_rag_graph() -> CompiledStateGraph:
@@ -1,13 +1,16 @@
-from workflows.nodes.extract_keywords import extract_keywords_initial
+from workflows.nodes.extract_keywords import extract_keywords_initial, extract_keywords, keywords_ready
 from workflows.nodes.filename_detection import detect_filename
 from workflows.nodes.retriever import retrieve_documents_by_vector_search, retrieve_documents_by_fulltext_search
 from workflows.nodes.merge import merge_after_retrieve
-from workflows.nodes.decision_point import return_docs_or_generate_answer
+from workflows.nodes.fusion import fuse_retrieved_documents
+from workflows.nodes.rerank import rerank_documents
+from workflows.nodes.decision_point import return_docs_or_generate_answer, client_keywords_or_extract, rewrite_keywords_or_route_docs
 from workflows.nodes.return_docs import return_docs
 from workflows.nodes.generate_answer import (
     generate_answer_branching,
     generate_answer_agentic_rag_for_vector_search,
-    generate_answer_agentic_rag_for_fulltext_search
+    generate_answer_agentic_rag_for_fulltext_search,
+    generate_answer_agentic_rag_for_fused_search
 )
 from workflows.nodes.sourcing import show_source
 
@@ -16,19 +19,26 @@ from configs.env_configs import env_config
 
 NODE_FUNCTIONS = {
     "extract_keywords_initial": extract_keywords_initial,
+    "extract_keywords": extract_keywords,
+    "keywords_ready": keywords_ready,
     "detect_filename": detect_filename,
     "retrieve_documents_by_vector_search": retrieve_documents_by_vector_search,
     "retrieve_documents_by_fulltext_search": retrieve_documents_by_fulltext_search,
     "merge_after_retrieve": merge_after_retrieve,
+    "fuse_retrieved_documents": fuse_retrieved_documents,
+    "rerank_documents": rerank_documents,
     "return_docs": return_docs,
     "generate_answer_branching": generate_answer_branching,
     "generate_answer_agentic_rag_for_vector_search": generate_answer_agentic_rag_for_vector_search,
     "generate_answer_agentic_rag_for_fulltext_search": generate_answer_agentic_rag_for_fulltext_search,
+    "generate_answer_agentic_rag_for_fused_search": generate_answer_agentic_rag_for_fused_search,
     "show_source": show_source,
 }
 
 CONDITION_FUNCTIONS = {
     "return_docs_or_generate_answer": return_docs_or_generate_answer,
+    "client_keywords_or_extract": client_keywords_or_extract,
+    "rewrite_keywords_or_route_docs": rewrite_keywords_or_route_docs,
 }
 
 AGENTIC_RAG_WORKFLOW = load_workflow_config(
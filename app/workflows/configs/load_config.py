@@ -17,7 +17,11 @@ def load_workflow_config(
     edges = []
     for edge in config_data["edges"]:
         src, dst = edge 
-        src = START if src == "START" else src
+        # A list of sources is a join: `dst` runs once all of them have finished
+        if isinstance(src, list):
+            src = [START if node == "START" else node for node in src]
+        else:
+            src = START if src == "START" else src
         dst = END if dst == "END" else dst
         edges.append((src, dst))
 
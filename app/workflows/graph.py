@@ -1,7 +1,14 @@
+import asyncio
+import inspect
+import time
+from functools import wraps
 from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple, Union
+
+from utils.metrics import node_duration_seconds
+from utils.tracing import node_timings
 
 @dataclass(frozen=True)
 class ConditionalEdgeConfig:
@@ -12,13 +19,54 @@ class ConditionalEdgeConfig:
 @dataclass(frozen=True)
 class WorkflowConfig:
     nodes: Dict[str, Callable]
-    edges: List[Tuple[str, str]]
+    edges: List[Tuple[Union[str, List[str]], str]]
     conditional_edges: List[ConditionalEdgeConfig]
 
+def instrument_node(workflow: str, name: str, fn: Callable) -> Callable:
+    """
+    Wrap a node to record its duration and outcome (ok, error or cancelled),
+    and append it to the current request's timings when there is one.
+    `wraps` keeps the signature LangGraph inspects to inject `runtime`.
+    """
+
+    def record(started_at: float, outcome: str) -> None:
+        duration = time.perf_counter() - started_at
+        node_duration_seconds.observe(duration, workflow=workflow, node=name, outcome=outcome)
+        timings = node_timings.get()
+        if timings is not None:
+            timings.append((name, duration))
+
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def node(*args, **kwargs):
+            started_at, outcome = time.perf_counter(), "error"
+            try:
+                result = await fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                record(started_at, outcome)
+    else:
+        @wraps(fn)
+        def node(*args, **kwargs):
+            started_at, outcome = time.perf_counter(), "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                record(started_at, outcome)
+    return node
+
 class WorkflowGraphBuilder:
     """
     Generic LangGraph workflow builder.
     Fully driven by WorkflowConfig.
+    With `instrument`, every node is wrapped by `instrument_node`;
+    without it the node functions are added untouched.
     """
 
     def __init__(
@@ -27,10 +75,14 @@ class WorkflowGraphBuilder:
         state_schema: type,
         context_schema: type,
         workflow_config: WorkflowConfig,
+        instrument: bool = False,
+        name: str = "workflow",
     ):
         self.state_schema = state_schema
         self.context_schema = context_schema
         self.config = workflow_config
+        self.instrument = instrument
+        self.name = name
 
     def build(self) -> CompiledStateGraph:
         graph = StateGraph(
@@ -39,7 +91,7 @@ class WorkflowGraphBuilder:
         )
 
         for name, fn in self.config.nodes.items():
-            graph.add_node(name, fn)
+            graph.add_node(name, instrument_node(self.name, name, fn) if self.instrument else fn)
 
         for src, dst in self.config.edges:
             graph.add_edge(src, dst)
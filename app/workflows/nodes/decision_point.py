@@ -2,6 +2,9 @@ from langgraph.runtime import Runtime
 from typing import Literal
 
 from workflows.states import AgenticRAGState, AgenticRAGContextSchema
+from configs.env_configs import env_config
+from utils.metrics import keyword_source_total
+from utils.logger import logger
 
 def return_docs_or_generate_answer(
     state : AgenticRAGState, 
@@ -12,5 +15,29 @@ def return_docs_or_generate_answer(
         return "return_docs"
     return "generate_answer"
 
+def client_keywords_or_extract(
+    state : AgenticRAGState,
+    runtime : Runtime[AgenticRAGContextSchema]
+) -> Literal["client_keywords", "extract_keywords"]:
+    """Use the keywords sent with the request when there are any, otherwise ask the LLM."""
+
+    if state["messages"][-1].content.strip():
+        keyword_source_total.inc(source="client")
+        return "client_keywords"
+    keyword_source_total.inc(source="llm")
+    return "extract_keywords"
 
+def rewrite_keywords_or_route_docs(
+    state : AgenticRAGState,
+    runtime : Runtime[AgenticRAGContextSchema]
+) -> Literal["rewrite_keywords", "return_docs", "generate_answer"]:
+    """
+        Retry with rewritten keywords while nothing was retrieved (at most MAX_KEYWORD_REWRITES times),
+        otherwise route like `return_docs_or_generate_answer`.
+    """
 
+    retrieved = state["vector_docs"] or state["full_text_docs"] or state.get("fused_docs")
+    if not retrieved and state["rewrite_count"] < env_config.max_keyword_rewrites:
+        logger.info(f"Nothing retrieved, rewriting keywords (attempt {state['rewrite_count'] + 1})")
+        return "rewrite_keywords"
+    return return_docs_or_generate_answer(state, runtime)
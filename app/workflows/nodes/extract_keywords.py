@@ -4,28 +4,34 @@ from langchain_core.messages import AIMessage
 from workflows.states import AgenticRAGState, AgenticRAGContextSchema
 from configs.env_configs import env_config
 
-def extract_keywords_initial(state: AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+async def extract_keywords_initial(state: AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
     """Rewrite the original user question."""
     question = state["messages"][0].content
     prompt = runtime.context.prompt_registry.get("extract_keywords", "initial", "v1").format(question=question)
-    response = runtime.context.llm.get_completions(
+    response = await runtime.context.llm.aget_completions(
         model_name=env_config.generation_model,
         temperature=0.0,
         message=[{"role": "user", "content": prompt}]
     )
     return {"messages": [AIMessage(content=response.content)]}
 
-def extract_keywords(state: AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
-    """Rewrite the original user question."""
+async def keywords_ready(state: AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+    """
+        Joining point once keywords are known, either sent by the client or extracted
+    """
+    return {}
+
+async def extract_keywords(state: AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+    """Rewrite the keywords of a retrieval that found nothing; the retrievers run again on the new ones."""
     question = state["messages"][0].content
-    previous_keywords = state["messages"][-2].content
+    previous_keywords = state["messages"][-1].content
     prompt = runtime.context.prompt_registry.get("extract_keywords", "retry", "v1").format(question=question, previous_keywords=previous_keywords)
-    response = runtime.context.llm.get_completions(
+    response = await runtime.context.llm.aget_completions(
         model_name=env_config.generation_model,
         temperature=0.0,
         message=[{"role": "user", "content": prompt}]
     )
     return {
-        "messages": [{"role": "user", "content": response.content}],
+        "messages": [AIMessage(content=response.content)],
         "rewrite_count": state["rewrite_count"] + 1
     }
\ No newline at end of file
@@ -5,24 +5,50 @@ from workflows.states import AgenticRAGState, AgenticRAGContextSchema
 from configs.env_configs import env_config
 from utils.logger import logger
 
-def detect_filename(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+async def detect_filename(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
 
     if not runtime.context.use_file_filtering:
         logger.info("File filtering is disabled. Skipping filename detection.")
-        return state
+        return {"filtered_filenames" : []}
 
-    question = state["messages"][-1].content
-    available_filenames = runtime.context.mongodb_manager.get_unique_field_values(
+    # Only the original question: this node may run in parallel with keyword extraction
+    question = state["messages"][0].content
+    # Read before the catalog: a refresh in between then only costs an extra index rebuild, never a stale index
+    catalog_version = runtime.context.mongodb_manager.get_filename_catalog_version(
         db_name=state["mongodb_dbname"],
         collection_name=state["mongodb_files_collection"],
         field_name="filename"
     )
+    available_filenames = await runtime.context.mongodb_manager.aget_filename_catalog(
+        db_name=state["mongodb_dbname"],
+        collection_name=state["mongodb_files_collection"],
+        field_name="filename"
+    )
+
+    shortlist_size = env_config.filename_shortlist_size
+    if shortlist_size and len(available_filenames) > shortlist_size:
+        ranked = await runtime.context.filename_index.ashortlist(
+            key=(state["mongodb_dbname"], state["mongodb_files_collection"]),
+            version=catalog_version,
+            filenames=available_filenames,
+            question=question,
+            top_n=shortlist_size
+        )
+
+        threshold = env_config.filename_auto_select_threshold
+        confident = [available_filenames[fid] for fid, score in ranked if threshold and score >= threshold]
+        if confident:
+            logger.info(f"Filenames chosen by similarity: {confident}")
+            return {"filtered_filenames" : confident}
+
+        available_filenames = {fid: available_filenames[fid] for fid, _ in ranked}
+
     prompt = runtime.context.prompt_registry.get("detection", "filename", "v1").format(
         question=question,
         available_files="\n".join(f"{fid}: {fn}" for fid, fn in available_filenames.items())
     )
 
-    response = runtime.context.llm.get_completions(
+    response = await runtime.context.llm.aget_completions(
         model_name=env_config.generation_model,
         temperature=0.0,
         message=[{"role": "user", "content": prompt}]
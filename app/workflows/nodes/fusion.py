@@ -0,0 +1,46 @@
+from langgraph.runtime import Runtime
+from langchain.schema import Document
+from typing import Dict, Hashable, List
+
+from workflows.states import AgenticRAGState, AgenticRAGContextSchema
+from configs.env_configs import env_config
+from utils.logger import logger
+
+def chunk_key(doc : Document) -> Hashable:
+    """Identity of a chunk across retrievers: (fileId, chunk_index), falling back to the content."""
+    file_id = doc.metadata.get("fileId")
+    chunk_index = doc.metadata.get("chunk_index")
+    if file_id is None or chunk_index is None:
+        return doc.page_content
+    return (file_id, chunk_index)
+
+def reciprocal_rank_fusion(rankings : List[List[Document]], k : int = 60) -> List[Document]:
+    """
+    Merge ranked document lists with reciprocal rank fusion.
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in; chunks found by several
+    retrievers are kept once, with the metadata of their first occurrence and a `fusion_score`.
+    """
+    scores : Dict[Hashable, float] = {}
+    docs : Dict[Hashable, Document] = {}
+
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return [
+        Document(page_content=docs[key].page_content, metadata={**docs[key].metadata, "fusion_score": scores[key]})
+        for key in fused
+    ]
+
+async def fuse_retrieved_documents(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+    """Fuse vector and full-text results into one ranked list for a single generation."""
+    fused_docs = reciprocal_rank_fusion([state["vector_docs"], state["full_text_docs"]], k=env_config.rrf_k)
+
+    logger.info(
+        f"Fused {len(state['vector_docs'])} vector and {len(state['full_text_docs'])} full-text docs "
+        f"into {len(fused_docs)} docs"
+    )
+    return {"fused_docs": fused_docs}
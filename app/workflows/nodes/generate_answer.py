@@ -1,7 +1,9 @@
+import asyncio
 from langgraph.runtime import Runtime
 from langchain.schema import Document
 from langchain_core.messages import AIMessage
-from typing import List, Tuple, Dict, Any
+from langchain_core.callbacks.manager import adispatch_custom_event
+from typing import List, Optional, Tuple, Dict, Any
 
 from workflows.states import (
     AgenticRAGState,
@@ -12,61 +14,129 @@ from workflows.states import (
 
 from configs.env_configs import env_config
 from utils.logger import logger
-
-def augment_context(docs : List[Document]) -> Tuple[str, Dict[str, Any]]:
-
-    context = ""
+from utils.token_counter import get_token_counter
+
+MIN_SNIPPET_TOKENS = 32
+
+def augment_context(
+        docs : List[Document],
+        terms : Optional[List[str]] = None,
+        token_budget : int = 0,
+        max_snippet_tokens : int = 0
+    ) -> Tuple[str, Dict[str, Any]]:
+    """
+    Number and pack snippets into the prompt context, in ranking order.
+    - Snippets longer than `max_snippet_tokens` are trimmed around the `terms` hits
+    - Snippets that no longer fit `token_budget` are skipped (the first one is trimmed to fit instead)
+    - 0 disables either limit; sourcing indices follow the packed snippets
+    """
+
+    counter = get_token_counter(env_config.context_tokenizer_encoding) if token_budget or max_snippet_tokens else None
+
+    parts = []
     sourcing = {}
-    for i, doc in enumerate(docs):
-        sourcing[i+1] = {"text" : doc.page_content, **doc.metadata}
-        context += f"Snippet {i+1} : {doc.page_content} <end_of_snippet>\n"
-    return (context, sourcing)
-
-def generate_answer_agentic_rag_for_vector_search(
-        state: AgenticRAGState, 
-        runtime : Runtime[AgenticRAGContextSchema]
-    ):
-    """Generate an answer."""
+    used_tokens = 0
+    for doc in docs:
+        content = doc.page_content
+        if max_snippet_tokens:
+            content = counter.trim(content, max_snippet_tokens, terms)
+
+        idx = len(parts) + 1
+        part = f"Snippet {idx} : {content} <end_of_snippet>\n"
+
+        if token_budget:
+            tokens = counter.count(part)
+            if used_tokens + tokens > token_budget:
+                remaining = token_budget - used_tokens - (tokens - counter.count(content))
+                if parts or remaining < MIN_SNIPPET_TOKENS:
+                    continue
+                trimmed = counter.trim(content, remaining, terms)
+                # The `...` markers may push it over: trim once more by the excess
+                excess = used_tokens + counter.count(f"Snippet {idx} : {trimmed} <end_of_snippet>\n") - token_budget
+                if excess > 0:
+                    trimmed = counter.trim(content, remaining - excess, terms)
+                part = f"Snippet {idx} : {trimmed} <end_of_snippet>\n"
+                tokens = counter.count(part)
+            used_tokens += tokens
+
+        sourcing[idx] = {"text" : doc.page_content, **doc.metadata}
+        parts.append(part)
+
+    if counter is not None:
+        logger.info(f"Packed {len(parts)} of {len(docs)} snippets into the context ({used_tokens} tokens)")
+    return ("".join(parts), sourcing)
+
+async def publish_sources(path : str, sourcing : Dict[str, Any]):
+    """Announce the sources of a generation path to streaming consumers before its tokens."""
+    await adispatch_custom_event("sources", {"path" : path, "sourcing" : sourcing})
+
+async def generate_answer_for_docs(
+        state: AgenticRAGState,
+        runtime : Runtime[AgenticRAGContextSchema],
+        docs : List[Document],
+        path : str,
+        sourcing_key : str
+    ) -> Dict[str, Any]:
+    """
+    Generate an answer over `docs`, tagged with its retrieval path.
+    A failed or timed out generation (GENERATION_TIMEOUT_SECONDS) is recorded in `failed_generations`
+    instead of raising, so a parallel branch can still answer.
+    """
 
     question = state["messages"][0].content
-    docs =  state["vector_docs"]
-    context, sourcing  = augment_context(docs)
+    keywords = state["messages"][-1].content.split(",")
+    context, sourcing  = augment_context(
+        docs,
+        terms=[*keywords, *question.split()],
+        token_budget=env_config.context_token_budget,
+        max_snippet_tokens=env_config.context_max_snippet_tokens
+    )
+    await publish_sources(path, sourcing)
 
     prompt = runtime.context.prompt_registry.get("generate_answer", "agentic_rag", "v1").format(question=question, context=context)
 
-    response = runtime.context.llm.get_completions(
-        model_name=env_config.generation_model,
-        temperature=0.0,
-        message=[{"role": "user", "content": prompt}]
-    )
+    try:
+        response = await asyncio.wait_for(
+            runtime.context.llm.aget_completions(
+                model_name=env_config.generation_model,
+                temperature=0.0,
+                message=[{"role": "user", "content": prompt}]
+            ),
+            timeout=env_config.generation_timeout_seconds or None
+        )
+    except Exception as e:
+        logger.error(f"Generation for {path} failed, continuing without it: {type(e).__name__} {str(e)}")
+        return {"failed_generations": [path], sourcing_key : sourcing}
 
-    answer = AIMessage(content=response.content, additional_kwargs={ "path" : "vector_search"})
+    answer = AIMessage(content=response.content, additional_kwargs={ "path" : path})
 
-    return {"messages": [answer], "sourcing_vector_search" : sourcing}
+    return {"messages": [answer], sourcing_key : sourcing}
 
-def generate_answer_agentic_rag_for_fulltext_search(
+async def generate_answer_agentic_rag_for_vector_search(
         state: AgenticRAGState, 
         runtime : Runtime[AgenticRAGContextSchema]
     ):
     """Generate an answer."""
 
-    question = state["messages"][0].content
-    docs =  state["full_text_docs"]
-    context, sourcing  = augment_context(docs)
+    return await generate_answer_for_docs(state, runtime, state["vector_docs"], "vector_search", "sourcing_vector_search")
 
-    prompt = runtime.context.prompt_registry.get("generate_answer", "agentic_rag", "v1").format(question=question, context=context)
+async def generate_answer_agentic_rag_for_fulltext_search(
+        state: AgenticRAGState, 
+        runtime : Runtime[AgenticRAGContextSchema]
+    ):
+    """Generate an answer."""
 
-    response = runtime.context.llm.get_completions(
-        model_name=env_config.generation_model,
-        temperature=0.0,
-        message=[{"role": "user", "content": prompt}]
-    )
+    return await generate_answer_for_docs(state, runtime, state["full_text_docs"], "fulltext_search", "sourcing_full_text_search")
 
-    answer = AIMessage(content=response.content, additional_kwargs={ "path" : "fulltext_search"})
+async def generate_answer_agentic_rag_for_fused_search(
+        state: AgenticRAGState, 
+        runtime : Runtime[AgenticRAGContextSchema]
+    ):
+    """Generate a single answer over the fused vector and full-text documents."""
 
-    return {"messages": [answer], "sourcing_full_text_search" : sourcing}
+    return await generate_answer_for_docs(state, runtime, state["fused_docs"], "fused", "sourcing_fused_search")
 
-def generate_answer_smart_sql(
+async def generate_answer_smart_sql(
         state: SmartSQLPipelineState,
         runtime : Runtime[SmartSQLPipelineContextSchema]
     ):
@@ -75,7 +145,7 @@ def generate_answer_smart_sql(
     context = state["messages"][-1].content
     logger.info(f"------\n\n{context}\n\n------------")
     prompt = runtime.context.prompt_registry.get("generate_answer", "smart_sql", "v1").format(question=question, context=context)
-    response = runtime.context.llm.get_completions(
+    response = await runtime.context.llm.aget_completions(
         model_name=env_config.generation_model,
         temperature=0.0,
         message=[{"role": "user", "content": prompt}]
@@ -85,5 +155,5 @@ def generate_answer_smart_sql(
 
     return {"messages": [answer]}
 
-def generate_answer_branching(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+async def generate_answer_branching(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
     return state
\ No newline at end of file
@@ -0,0 +1,38 @@
+from langgraph.runtime import Runtime
+from langchain.schema import Document
+
+from workflows.states import AgenticRAGState, AgenticRAGContextSchema
+from configs.env_configs import env_config
+from utils.logger import logger
+
+
+async def rerank_documents(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+    """
+        Rerank the documents about to be generated from against the question and keep the best ones:
+        the fused list when a fusion node ran, otherwise the vector and full-text lists.
+        All candidates are scored in a single batch.
+    """
+    question = state["messages"][0].content
+    top_k = env_config.rerank_top_k or state["top_k"]
+
+    if state.get("fused_docs"):
+        doc_lists = {"fused_docs": state["fused_docs"]}
+    else:
+        doc_lists = {"vector_docs": state["vector_docs"], "full_text_docs": state["full_text_docs"]}
+    texts = list(dict.fromkeys(doc.page_content for docs in doc_lists.values() for doc in docs))
+    if not texts:
+        return {}
+
+    scores = dict(zip(texts, await runtime.context.reranker.ascore(question, texts)))
+
+    update = {}
+    for key, docs in doc_lists.items():
+        if not docs:
+            continue
+        ranked = sorted(docs, key=lambda doc: scores[doc.page_content], reverse=True)[:top_k]
+        update[key] = [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "rerank_score": scores[doc.page_content]})
+            for doc in ranked
+        ]
+        logger.info(f"Reranked {key} : kept {len(update[key])} of {len(docs)}")
+    return update
@@ -1,12 +1,30 @@
 from langgraph.runtime import Runtime
 from langchain.schema import Document
 from weaviate.classes.query import Filter
-from typing import List
+from typing import List, Optional
 
+from ai import Embedding
+from db import RetrievalMemo
 from workflows.states import AgenticRAGState, AgenticRAGContextSchema
 from configs.env_configs import env_config
 from utils.logger import logger
 
+def search_keywords(state : AgenticRAGState) -> List[str]:
+    """Current keywords (the latest extraction or the client's) plus the original question."""
+    keywords = [keyword.strip() for keyword in state["messages"][-1].content.split(",") if keyword.strip()]
+    keywords.append(state["messages"][0].content)
+    return keywords
+
+async def embed_keywords(embedding : Embedding, memo : Optional[RetrievalMemo], keywords : List[str]) -> List[List[float]]:
+    """Keyword vectors, embedded once per memo scope (keyword retries and batches reuse earlier vectors)."""
+    if memo is None:
+        return await embedding.aget_embeddings_batch(keywords)
+
+    return await memo.aget_many(
+        [("embedding", embedding.model_name, keyword) for keyword in keywords],
+        lambda missing: embedding.aget_embeddings_batch([key[2] for key in missing])
+    )
+
 def sort_documents_by_score(docs : List[Document], top_k : int = 50) -> List[Document]:
     docs = sorted(docs, key=lambda d: d.metadata.get("score", 0), reverse=True)[:top_k]
     return remove_duplicate_documents(docs)
@@ -87,7 +105,7 @@ def remove_duplicate_documents(documents: List[Document], by: str = "uuid") -> L
     
     return unique_docs
 
-def retrieve_documents_by_vector_search(
+async def retrieve_documents_by_vector_search(
     state : AgenticRAGState, 
     runtime : Runtime[AgenticRAGContextSchema]
 ) -> str:
@@ -95,10 +113,7 @@ def retrieve_documents_by_vector_search(
     """Query vector database. Use this for any question regarding national rules of IR"""
 
     filenames = state["filtered_filenames"]
-    query = state["messages"][-1].content
-    initial_question = state["messages"][0].content
-    keywords = query.split(",")
-    keywords.append(initial_question)
+    keywords = search_keywords(state)
 
     logger.info(f"\n\nKeywords : {keywords}\n\n")
 
@@ -112,32 +127,48 @@ def retrieve_documents_by_vector_search(
             "limit": state["top_k"],
             "alpha": env_config.hybrid_search_alpha,
             "target_vector": "keywords_vector",
-            "vector" : runtime.context.embedding.get_embeddings(query)
+            "vector" : (await embed_keywords(runtime.context.embedding, runtime.context.retrieval_memo, [query]))[0]
         }
 
         if filenames != []:
             query_params["filters"] = (Filter.by_property("filename").contains_any(filenames))
 
-        response = runtime.context.weaviate_manager.query_params(state["weaviate_collection"], query_params)
+        response = await runtime.context.weaviate_manager.aquery_params(
+            state["weaviate_collection"],
+            query_params,
+            memo=runtime.context.retrieval_memo
+        )
         vector_search_docs.extend(response)
 
     else:
 
-        for keyword in keywords:
+        keyword_vectors = await embed_keywords(runtime.context.embedding, runtime.context.retrieval_memo, keywords)
+        params_list = []
+
+        for keyword, keyword_vector in zip(keywords, keyword_vectors):
 
             query_params = {
                 "query": keyword,
                 "limit": state["top_k"],
                 "alpha": env_config.hybrid_search_alpha,
                 "target_vector": "keywords_vector",
-                "vector" : runtime.context.embedding.get_embeddings(keyword)
+                "vector" : keyword_vector
             }
         
             if filenames != []:
                 query_params["filters"] = (Filter.by_property("filename").contains_any(filenames))
 
-            response = runtime.context.weaviate_manager.query_params(state["weaviate_collection"], query_params)
-            vector_search_docs.extend(response)
+            params_list.append(query_params)
+
+        response = await runtime.context.weaviate_manager.aquery_many(
+            state["weaviate_collection"],
+            params_list,
+            top_k=state["top_k"],
+            max_concurrency=env_config.retrieval_max_concurrency,
+            timeout_seconds=env_config.retrieval_timeout_seconds,
+            memo=runtime.context.retrieval_memo
+        )
+        vector_search_docs.extend(response)
 
     vector_search_docs = sort_documents_by_score(vector_search_docs, state["top_k"])
     logger.info(f"Length docs vector search : {len(vector_search_docs)}")
@@ -145,7 +176,7 @@ def retrieve_documents_by_vector_search(
         logger.info(f"Doc filename : {doc.metadata.get('filename')} - score : {doc.metadata.get('score')}")
     return { "vector_docs" : vector_search_docs }
 
-def retrieve_documents_by_fulltext_search(
+async def retrieve_documents_by_fulltext_search(
     state : AgenticRAGState, 
     runtime : Runtime[AgenticRAGContextSchema]
 ) -> str:
@@ -153,26 +184,20 @@ def retrieve_documents_by_fulltext_search(
     """Query vector database. Use this for any question regarding national rules of IR"""
 
     filenames = state["filtered_filenames"]
-    query = state["messages"][-1].content
-    initial_question = state["messages"][0].content
-    keywords = query.split(",")
-    keywords.append(initial_question)
+    keywords = search_keywords(state)
 
     logger.info(f"\n\nKeywords : {keywords}\n\n")
 
-    fulltext_search_docs = []
-
-    for keyword in keywords:
-
-
-        response = runtime.context.mongodb_manager.full_text_search(
-            state["mongodb_dbname"], 
-            state["mongodb_chunk_collection"], 
-            keyword,
-            filenames,
-            state["top_k"]
-        )
-        fulltext_search_docs.extend(response)
+    fulltext_search_docs = await runtime.context.mongodb_manager.afull_text_search_many(
+        state["mongodb_dbname"], 
+        state["mongodb_chunk_collection"], 
+        keywords,
+        filenames,
+        state["top_k"],
+        max_concurrency=env_config.retrieval_max_concurrency,
+        timeout_seconds=env_config.retrieval_timeout_seconds,
+        memo=runtime.context.retrieval_memo
+    )
     
     fulltext_search_docs = sort_documents_by_score(fulltext_search_docs, state["top_k"])
     logger.info(f"Length docs full-text search : {len(fulltext_search_docs)}")
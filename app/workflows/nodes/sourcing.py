@@ -6,6 +6,7 @@ from langgraph.runtime import Runtime
 
 from workflows.states import AgenticRAGState, AgenticRAGContextSchema
 from configs.env_configs import env_config
+from utils.logger import logger
 
 superscripts = "⁰¹²³⁴⁵⁶⁷⁸⁹"
 
@@ -42,6 +43,47 @@ def prettify_sources(text, sourcing):
 
     return replaced_text, superscript_to_idx
 
+class CitationRewriter:
+
+    """
+    Incremental version of `prettify_sources` for streamed answers
+    - Rewrites complete ` **(n)**` citations to superscripts, dropping unknown indices
+    - Holds back a trailing partial citation until the next chunk completes or breaks it
+    """
+
+    citation_pattern = re.compile(r" \*\*\((\d+)\)\*\*")
+    partial_pattern = re.compile(r" (\*(\*(\((\d+(\)(\*)?)?)?)?)?)?$")
+
+    def __init__(self, sourcing):
+        self.sourcing = sourcing
+        self.buffer = ""
+
+    def feed(self, chunk):
+        text = self.citation_pattern.sub(self._replace, self.buffer + chunk)
+        partial = self.partial_pattern.search(text)
+        if partial is None:
+            self.buffer = ""
+            return text
+        self.buffer = text[partial.start():]
+        return text[:partial.start()]
+
+    def flush(self):
+        text, self.buffer = self.buffer, ""
+        return text
+
+    def _replace(self, match):
+        idx = int(match.group(1))
+        return int_to_superscript(idx) if idx in self.sourcing else ""
+
+def source_link(src_meta, mongodb_db, mongodb_collection):
+    filename = src_meta["filename"]
+    file_id = src_meta.get("fileId")
+    chunk_index = src_meta.get("chunk_index", 0)
+    encoded_filename = urllib.parse.quote(filename)
+    sourcing_filename = f"{os.path.splitext(filename)[0]}_{chunk_index}.jpg"
+    download_url = f"{env_config.source_download_api_path_base}/{mongodb_db}/{mongodb_collection}/{encoded_filename}/{file_id}/{chunk_index}"
+    return f"![{sourcing_filename}]({download_url})"
+
 def concatenate_answer(answer, sourcing, mongodb_db, mongodb_collection):
     new_answer, source_matching = prettify_sources(answer, sourcing)
     has_sources = bool(source_matching)
@@ -51,48 +93,44 @@ def concatenate_answer(answer, sourcing, mongodb_db, mongodb_collection):
     sorted_items = sorted(source_matching.items(), key=lambda x: superscript_to_int(x[0]))
 
     for superscript, idx in sorted_items:
-        src_meta = sourcing[idx]
-        filename = src_meta["filename"]
-        file_id = src_meta.get("fileId")
-        chunk_index = src_meta.get("chunk_index", 0)
-        encoded_filename = urllib.parse.quote(filename)
-        sourcing_filename = f"{os.path.splitext(filename)[0]}_{chunk_index}.jpg"
-        download_url = f"{env_config.source_download_api_path_base}/{mongodb_db}/{mongodb_collection}/{encoded_filename}/{file_id}/{chunk_index}"
-        download_link = f"![{sourcing_filename}]({download_url})"
+        download_link = source_link(sourcing[idx], mongodb_db, mongodb_collection)
         new_answer += f"{superscript} {download_link}\n"
 
     return new_answer.strip() if has_sources else ""
 
-def show_source(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
+# Generation path -> state key holding its snippet numbering, in output order
+SOURCING_KEYS = {
+    "vector_search" : "sourcing_vector_search",
+    "fulltext_search" : "sourcing_full_text_search",
+    "fused" : "sourcing_fused_search",
+}
+
+async def show_source(state : AgenticRAGState, runtime : Runtime[AgenticRAGContextSchema]):
 
+    answers = {}
     for message in state["messages"]:
-        if message.additional_kwargs.get("path") == "vector_search":
-            answer_vector_search = message.content
-        elif message.additional_kwargs.get("path") == "fulltext_search":
-            answer_fulltext_search = message.content
+        path = message.additional_kwargs.get("path")
+        if path in SOURCING_KEYS:
+            answers[path] = message.content
 
-    if answer_vector_search == None or answer_fulltext_search == None:
+    if not answers:
         raise ValueError("Answers Can't be of None value")
 
-    sourcing_vector_search = state["sourcing_vector_search"]
-    sourcing_fulltext_search = state["sourcing_full_text_search"]
+    if state.get("failed_generations"):
+        logger.warning(f"Answering without failed generation paths : {state['failed_generations']}")
 
     pdf_page_collection = state["mongodb_page_collection"]
 
-    answer_string_vector_search = concatenate_answer(
-        answer_vector_search, 
-        sourcing_vector_search, 
-        state["mongodb_dbname"], 
-        pdf_page_collection
-    )
-
-    answer_string_fulltext_search = concatenate_answer(
-        answer_fulltext_search, 
-        sourcing_fulltext_search, 
-        state["mongodb_dbname"], 
-        pdf_page_collection
-    )
+    answer_strings = [
+        concatenate_answer(
+            answers[path],
+            state[sourcing_key],
+            state["mongodb_dbname"],
+            pdf_page_collection
+        )
+        for path, sourcing_key in SOURCING_KEYS.items() if path in answers
+    ]
 
-    final_answer = f"{answer_string_vector_search}\n\n{answer_string_fulltext_search}"
+    final_answer = "\n\n".join(answer_strings)
 
-    return {"messages": [SystemMessage(content=final_answer)]}
\ No newline at end of file
+    return {"messages": [SystemMessage(content=final_answer)]}
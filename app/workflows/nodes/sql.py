@@ -14,13 +14,13 @@ def clean_sql(sql: str) -> str:
     # Remove Markdown code fences like ```sql ... ```
     return re.sub(r"^```(?:sql)?|```$", "", sql.strip(), flags=re.MULTILINE).strip()
 
-def generate_sql(question: str, llm : Any, sql_manager : Any, prompt_registry : Any) -> str:
+async def generate_sql(question: str, llm : Any, sql_manager : Any, prompt_registry : Any) -> str:
     """Generate SQL query from Persian question"""
 
     schema = sql_manager.get_combined_schema()
     prompt = prompt_registry.get("sql", "sql_query_generation", "v1").format(question=question, schema=schema)
 
-    response = llm.invoke(
+    response = await llm.aget_completions(
         model_name=env_config.sql_generation_model,
         temperature=0.0,
         message=[{"role": "user", "content": prompt}]
@@ -33,7 +33,7 @@ def generate_sql(question: str, llm : Any, sql_manager : Any, prompt_registry :
     
     return sql_query
 
-def execute_sql(state: SmartSQLPipelineState, runtime : Runtime[SmartSQLPipelineContextSchema]) -> str:
+async def execute_sql(state: SmartSQLPipelineState, runtime : Runtime[SmartSQLPipelineContextSchema]) -> str:
     """Execute SQL to get information rows"""
 
     question = state["messages"][-1].content
@@ -41,8 +41,8 @@ def execute_sql(state: SmartSQLPipelineState, runtime : Runtime[SmartSQLPipeline
     for _ in range(SQL_GENERATION_MAX_RETRIES):
         result = ""
         try:
-            sql_query = generate_sql(question, runtime.context.llm, runtime.context.sql_manager, runtime.context.prompt_registry)
-            extracted_data = runtime.context.sql_manager.execute_sql(sql_query)
+            sql_query = await generate_sql(question, runtime.context.llm, runtime.context.sql_manager, runtime.context.prompt_registry)
+            extracted_data = await runtime.context.sql_manager.aexecute_sql(sql_query)
 
             for row in extracted_data:
                 for key in row.keys():
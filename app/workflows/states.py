@@ -1,19 +1,24 @@
+import operator
 from dataclasses import dataclass
 from langchain.schema import Document
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
-from typing import Annotated, TypedDict, List
+from typing import Annotated, TypedDict, List, Optional
 
-from db import WeaviateClientManager, MongoDBManager,SQLDatabaseManager
-from ai import LLM, Embedding, PromptRegistry
+from db import WeaviateClientManager, MongoDBManager,SQLDatabaseManager, RetrievalMemo
+from ai import LLM, Embedding, FilenameIndex, Reranker, PromptRegistry
 
 class AgenticRAGState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     vector_docs: List[Document]
     full_text_docs: List[Document]
+    fused_docs: List[Document]
     sourcing_vector_search: dict
     sourcing_full_text_search : dict
+    sourcing_fused_search : dict
+    failed_generations : Annotated[List[str], operator.add]
     filtered_filenames : List[str]
+    rewrite_count : int
     top_k: int
     return_docs: bool
     weaviate_collection: str
@@ -31,9 +36,12 @@ class AgenticRAGContextSchema:
     mongodb_manager : MongoDBManager
     llm : LLM
     embedding : Embedding
+    filename_index : FilenameIndex
+    reranker : Reranker
     use_file_filtering : bool
     use_basic_vector_search : bool
     prompt_registry : PromptRegistry
+    retrieval_memo : Optional[RetrievalMemo] = None
 
 @dataclass
 class SmartSQLPipelineContextSchema:
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass, field
+from threading import Lock
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+VOCABULARY = (
+    "regulation article permit inspection penalty deadline employer contract audit compliance "
+    "safety report license appeal exemption tariff invoice approval authority procedure "
+    "statement obligation clause amendment registry notice transfer payment schedule"
+).split()
+
+def stable_hash(*parts : Any) -> int:
+    """Process-independent hash (unlike `hash()`), so every run sees the same data."""
+    return zlib.crc32("\x1f".join(str(part) for part in parts).encode("utf-8"))
+
+def words(seed : int, count : int) -> List[str]:
+    return [VOCABULARY[(seed + i * 7) % len(VOCABULARY)] for i in range(count)]
+
+@dataclass
+class LatencyProfile:
+
+    """
+    Simulated backend latencies in seconds
+    - `jitter` is a +/- fraction derived from the call payload, never from a random generator
+    - LLM latency is `llm_seconds` plus `llm_seconds_per_token` per completion token
+    """
+
+    llm_seconds : float = 0.05
+    llm_seconds_per_token : float = 0.0
+    embedding_seconds : float = 0.01
+    weaviate_seconds : float = 0.01
+    mongodb_seconds : float = 0.01
+    jitter : float = 0.2
+
+    def delay(self, base : float, *key : Any) -> float:
+        if base <= 0:
+            return 0.0
+        spread = (stable_hash(*key) % 2001 - 1000) / 1000
+        return max(0.0, base * (1 + self.jitter * spread))
+
+@dataclass
+class CallStats:
+
+    """Backend call and token tallies, reset between benchmark phases."""
+
+    counts : Dict[str, int] = field(default_factory=dict)
+    _lock : Lock = field(default_factory=Lock)
+
+    def add(self, name : str, value : int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def reset(self) -> Dict[str, int]:
+        with self._lock:
+            counts, self.counts = self.counts, {}
+        return counts
+
+class FakeCorpus:
+
+    """Synthetic chunks shared by the Weaviate and MongoDB fakes."""
+
+    def __init__(self, size : int = 500, files : int = 25, chunk_words : int = 120):
+        self.size = size
+        self.files = [f"document_{i:03d}.pdf" for i in range(files)]
+        self.chunk_words = chunk_words
+
+    def filename(self, chunk_id : int) -> str:
+        return self.files[chunk_id % len(self.files)]
+
+    def content(self, chunk_id : int) -> str:
+        return " ".join(words(chunk_id, self.chunk_words))
+
+    def matches(self, query : str, limit : int) -> List[int]:
+        start = stable_hash(query) % self.size
+        return [(start + i * 37) % self.size for i in range(limit)]
+
+# ---------------------------------------------------------------------------
+# Weaviate
+# ---------------------------------------------------------------------------
+
+class FakeWeaviateCollection:
+
+    def __init__(self, name : str, corpus : FakeCorpus, latency : LatencyProfile, stats : CallStats):
+        self.name = name
+        self.corpus = corpus
+        self.latency = latency
+        self.stats = stats
+        self.query = SimpleNamespace(hybrid=self.hybrid, fetch_objects=lambda **kwargs: SimpleNamespace(objects=[]))
+        self.aggregate = SimpleNamespace(over_all=lambda total_count=True: SimpleNamespace(total_count=corpus.size))
+        self.config = SimpleNamespace(get=lambda: SimpleNamespace(inverted_index_config=SimpleNamespace(index_timestamps=True)))
+
+    def exists(self) -> bool:
+        return True
+
+    def hybrid(self, query : str, limit : int = 5, filters : Any = None, **kwargs) -> SimpleNamespace:
+        self.stats.add("weaviate_queries")
+        time.sleep(self.latency.delay(self.latency.weaviate_seconds, "weaviate", query))
+
+        filenames = set(getattr(filters, "value", None) or [])
+        objects = []
+        for rank, chunk_id in enumerate(self.corpus.matches(query, limit * 2)):
+            if filenames and self.corpus.filename(chunk_id) not in filenames:
+                continue
+            objects.append(SimpleNamespace(
+                uuid=f"00000000-0000-0000-0000-{chunk_id:012d}",
+                properties={
+                    "content": self.corpus.content(chunk_id),
+                    "filename": self.corpus.filename(chunk_id),
+                    "fileId": f"file-{chunk_id % len(self.corpus.files)}",
+                    "chunk_index": chunk_id
+                },
+                metadata=SimpleNamespace(score=1.0 / (rank + 1), distance=None)
+            ))
+        return SimpleNamespace(objects=objects[:limit])
+
+class FakeWeaviateClient:
+
+    def __init__(self, corpus : FakeCorpus, latency : LatencyProfile, stats : CallStats, collections : List[str]):
+        self._collections = {name: FakeWeaviateCollection(name, corpus, latency, stats) for name in collections}
+        self.collections = SimpleNamespace(
+            get=lambda name: self._collections.get(name) or FakeWeaviateCollection(name, corpus, latency, stats),
+            list_all=lambda simple=True: {name: None for name in self._collections}
+        )
+
+    def is_live(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+# ---------------------------------------------------------------------------
+# MongoDB
+# ---------------------------------------------------------------------------
+
+class FakeCursor(list):
+
+    def sort(self, *args, **kwargs) -> "FakeCursor":
+        return self
+
+    def limit(self, count : int) -> "FakeCursor":
+        return FakeCursor(self[:count])
+
+class FakeMongoCollection:
+
+    def __init__(self, db_name : str, name : str, corpus : FakeCorpus, latency : LatencyProfile, stats : CallStats):
+        self.name = name
+        self.full_name = f"{db_name}.{name}"
+        self.corpus = corpus
+        self.latency = latency
+        self.stats = stats
+
+    def estimated_document_count(self) -> int:
+        return len(self.corpus.files) if self.name == "files.files" else self.corpus.size
+
+    def find(self, query : Dict[str, Any], projection : Optional[Dict[str, Any]] = None, *args, **kwargs) -> FakeCursor:
+        if "$text" not in query:
+            # Filename catalog loads from the files collection
+            after = (query.get("_id") or {}).get("$gt", -1)
+            return FakeCursor({"_id": i, "filename": filename} for i, filename in enumerate(self.corpus.files) if i > after)
+
+        search = query["$text"]["$search"]
+        self.stats.add("mongodb_queries")
+        time.sleep(self.latency.delay(self.latency.mongodb_seconds, "mongodb", search))
+
+        filenames = set((query.get("filename") or {}).get("$in") or [])
+        documents = FakeCursor()
+        for rank, chunk_id in enumerate(self.corpus.matches(f"text:{search}", 40)):
+            if filenames and self.corpus.filename(chunk_id) not in filenames:
+                continue
+            documents.append({
+                "_id": f"chunk-{chunk_id}",
+                "content": self.corpus.content(chunk_id),
+                "filename": self.corpus.filename(chunk_id),
+                "fileId": f"file-{chunk_id % len(self.corpus.files)}",
+                "chunk_index": chunk_id,
+                "score": 10.0 / (rank + 1)
+            })
+        return documents
+
+    def find_one(self, query : Dict[str, Any], *args, **kwargs) -> Dict[str, Any]:
+        return {"_id": "page", "filename": self.corpus.files[0], "length": 5, "originalBuffer": "aGVsbG8="}
+
+    def aggregate(self, pipeline : List[Dict[str, Any]], *args, **kwargs):
+        return iter([{"values": list(self.corpus.files)}])
+
+    def watch(self, *args, **kwargs):
+        raise NotImplementedError("Change streams are not simulated")
+
+class FakeMongoDatabase:
+
+    COLLECTIONS = ["files.files", "pdf_pages", "file_chunks"]
+
+    def __init__(self, name : str, corpus : FakeCorpus, latency : LatencyProfile, stats : CallStats):
+        self.name = name
+        self.corpus = corpus
+        self.latency = latency
+        self.stats = stats
+
+    def __getitem__(self, collection_name : str) -> FakeMongoCollection:
+        return FakeMongoCollection(self.name, collection_name, self.corpus, self.latency, self.stats)
+
+    def list_collection_names(self) -> List[str]:
+        return list(self.COLLECTIONS)
+
+class FakeMongoClient:
+
+    def __init__(self, corpus : FakeCorpus, latency : LatencyProfile, stats : CallStats, databases : List[str]):
+        self.corpus = corpus
+        self.latency = latency
+        self.stats = stats
+        self.databases = databases
+        self.admin = SimpleNamespace(command=lambda command: {"ok": 1})
+
+    def __getitem__(self, db_name : str) -> FakeMongoDatabase:
+        return FakeMongoDatabase(db_name, self.corpus, self.latency, self.stats)
+
+    def list_database_names(self) -> List[str]:
+        return list(self.databases)
+
+# ---------------------------------------------------------------------------
+# OpenAI-compatible LLM and embedding server
+# ---------------------------------------------------------------------------
+
+class FakeOpenAIServer:
+
+    """
+    httpx transport answering `/chat/completions` and `/embeddings` like an OpenAI-compatible server
+    - Completions are a few keywords followed by an answer citing snippets (1) and (2),
+      which every node of the agentic workflow can parse
+    - Streaming completions (`"stream": true`) are served as server-sent events
+    - Prompt and completion tokens are counted with the app's TokenCounter
+    """
+
+    def __init__(self, latency : LatencyProfile, stats : CallStats, token_counter : Any, embedding_dimensions : int = 64):
+        self.latency = latency
+        self.stats = stats
+        self.token_counter = token_counter
+        self.embedding_dimensions = embedding_dimensions
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request : httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if request.url.path.endswith("/embeddings"):
+            return await self.embeddings(payload)
+        return await self.chat_completion(payload)
+
+    async def embeddings(self, payload : Dict[str, Any]) -> httpx.Response:
+        texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        self.stats.add("embedding_requests")
+        self.stats.add("embedding_texts", len(texts))
+        await asyncio.sleep(self.latency.delay(self.latency.embedding_seconds, "embedding", *texts))
+
+        data = []
+        for index, text in enumerate(texts):
+            seed = stable_hash(text)
+            vector = [((seed >> (i % 24)) % 97) / 97 - 0.5 for i in range(self.embedding_dimensions)]
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return httpx.Response(200, json={"object": "list", "data": data, "model": payload.get("model")})
+
+    async def chat_completion(self, payload : Dict[str, Any]) -> httpx.Response:
+        prompt = "\n".join(str(message.get("content", "")) for message in payload["messages"])
+        seed = stable_hash(prompt)
+        text = f"{', '.join(words(seed, 3))}\nThe documents cover {' '.join(words(seed + 1, 12))} **(1)** and **(2)**."
+
+        prompt_tokens = self.token_counter.count(prompt)
+        completion_tokens = self.token_counter.count(text)
+        self.stats.add("llm_calls")
+        self.stats.add("prompt_tokens", prompt_tokens)
+        self.stats.add("completion_tokens", completion_tokens)
+
+        delay = self.latency.delay(self.latency.llm_seconds, "llm", prompt) + completion_tokens * self.latency.llm_seconds_per_token
+        await asyncio.sleep(delay)
+
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        base = {"id": f"bench-{seed}", "created": 0, "model": payload.get("model")}
+
+        if not payload.get("stream"):
+            return httpx.Response(200, json={
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        chunks = [text[start:start + 16] for start in range(0, len(text), 16)]
+        events = [
+            {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+            for chunk in chunks
+        ]
+        events.append({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode("utf-8"), headers={"content-type": "text/event-stream"})
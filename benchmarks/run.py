@@ -0,0 +1,391 @@
+"""
+Offline load benchmark for the agentic RAG API.
+
+Replays a JSONL file of `/api/v1/query` bodies against the FastAPI app in-process, with Weaviate,
+MongoDB, the LLM and the embedding server replaced by the deterministic fakes of `benchmarks.fakes`.
+Reports end-to-end and per-node latency percentiles, throughput per concurrency level, backend
+calls, token counts and per-request memory allocations.
+
+Run from the repository root:
+
+    python -m benchmarks.run --concurrency 1,4,16 --output bench.json
+    python -m benchmarks.run --baseline bench_main.json --max-regression 0.2   # exit code 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+import httpx
+
+from benchmarks.fakes import (
+    CallStats,
+    FakeCorpus,
+    FakeMongoClient,
+    FakeOpenAIServer,
+    FakeWeaviateClient,
+    LatencyProfile
+)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = Path(__file__).resolve().parent
+
+# `workflow` label of the benchmark graph's node durations
+BENCHMARK_WORKFLOW = "benchmark"
+
+# Fake backends: always forced, so a local .env can never point the benchmark at real services
+BACKEND_ENV = {
+    "API_KEY": "benchmark",
+    "BASE_URL": "http://llm.benchmark/v1",
+    "EMBEDDING_URL": "http://embedding.benchmark/v1/embeddings",
+    "WEAVIATE_HOST": "weaviate.benchmark",
+    "WEAVIATE_PORT": "8080",
+    "WEAVIATE_GRPC_PORT": "50051",
+    "WEAVIATE_USER_KEY": "benchmark",
+    "MONGODB_URI": "mongodb://mongodb.benchmark",
+    "MONGODB_INITDB_DEV_USERNAME": "benchmark",
+    "MONGODB_INITDB_DEV_PASSWORD": "benchmark",
+    "SOURCE_DOWNLOAD_API_PATH_BASE": "http://api.benchmark/api/v1/download",
+    "SQL_ENDPOINT_ENABLED": "false",
+    "EMBEDDING_CACHE_PATH": "",
+    "PAGE_IMAGE_CACHE_DIR": "",
+}
+
+# Tunables: defaults only, override them from the shell to benchmark another configuration
+DEFAULT_ENV = {
+    "GENERATION_MODEL": "benchmark-generation",
+    "SQL_GENERATION_MODEL": "benchmark-sql",
+    "EMBEDDING_MODEL": "benchmark-embedding",
+    "HYBRID_SEARCH_ALPHA": "0.25",
+    "ANSWER_CACHE_MAX_BYTES": "0",
+    "RETRIEVAL_CACHE_MAX_BYTES": "0",
+    "SQL_HOST": "sql.benchmark",
+    "SQL_PORT": "1433",
+    "SQL_USER": "benchmark",
+    "SQL_PASS": "benchmark",
+    "SQL_DB": "benchmark",
+    "SQL_METADATA_CACHE_PATH": "",
+    "SQL_REQUIRED_TABLES": "benchmark",
+    "AGENTIC_RAG_WORKFLOW_CONFIG_PATH": str(BENCHMARK_DIR / "workflows" / "agentic_rag.yaml"),
+    "SMART_SQL_WORKFLOW_CONFIG_PATH": str(BENCHMARK_DIR / "workflows" / "smart_sql.yaml"),
+    "PROMPTS_PATH": str(ROOT_DIR / "prompts_examples.yaml"),
+}
+
+def percentile(values : List[float], q : float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def summarize_seconds(values : List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+    }
+
+def bucket_percentile(bounds : Sequence[float], counts : Sequence[int], q : float) -> float:
+    """Percentile estimated from histogram bucket counts, interpolated linearly within the bucket (like PromQL `histogram_quantile`)."""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank = q / 100 * total
+    cumulative, lower = 0, 0.0
+    for bound, count in zip(bounds, counts):
+        if count and cumulative + count >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    # The +Inf bucket has no upper bound: report the largest finite one
+    return bounds[-1]
+
+def summarize_histogram(bounds : Sequence[float], counts : Sequence[int], total : float) -> Dict[str, float]:
+    count = sum(counts)
+    return {
+        "count": count,
+        "mean_ms": round(1000 * total / count, 3) if count else 0.0,
+        "p50_ms": round(1000 * bucket_percentile(bounds, counts, 50), 3),
+        "p95_ms": round(1000 * bucket_percentile(bounds, counts, 95), 3),
+        "p99_ms": round(1000 * bucket_percentile(bounds, counts, 99), 3),
+    }
+
+def node_durations(before : Dict[Tuple[str, ...], Any], after : Dict[Tuple[str, ...], Any], workflow : str) -> Dict[str, Tuple[List[int], float]]:
+    """Per-node bucket counts and duration sum observed between two `Histogram.snapshot()`s, all outcomes merged."""
+    nodes : Dict[str, Tuple[List[int], float]] = {}
+    for (series_workflow, node, outcome), (counts, total, _) in sorted(after.items()):
+        if series_workflow != workflow:
+            continue
+        previous_counts, previous_total, _ = before.get((series_workflow, node, outcome), ((0,) * len(counts), 0.0, 0))
+        merged_counts, merged_total = nodes.get(node, ([0] * len(counts), 0.0))
+        nodes[node] = (
+            [merged + current - old for merged, current, old in zip(merged_counts, counts, previous_counts)],
+            merged_total + total - previous_total
+        )
+    return {node: (counts, total) for node, (counts, total) in nodes.items() if sum(counts)}
+
+def load_queries(path : Path) -> List[Dict[str, Any]]:
+    queries = []
+    for line_number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        query = json.loads(line)
+        if "message" not in query or "weaviate_collection" not in query or "mongodb_dbname" not in query:
+            raise ValueError(f"{path}:{line_number} is not an /api/v1/query body (message, weaviate_collection and mongodb_dbname are required)")
+        queries.append(query)
+    if not queries:
+        raise ValueError(f"{path} has no queries")
+    return queries
+
+class Benchmark:
+
+    """
+    In-process benchmark session
+    - Installs the fakes, then imports the app (env config and clients are built at import time)
+    - Serves the app through httpx's ASGI transport with an instrumented build of the agentic graph,
+      per-node timings are read back from the `workflow_node_duration_seconds` histogram
+    """
+
+    def __init__(self, args : argparse.Namespace, queries : List[Dict[str, Any]]):
+        self.args = args
+        self.queries = queries
+        self.latency = LatencyProfile(
+            llm_seconds=args.llm_latency,
+            llm_seconds_per_token=args.llm_latency_per_token,
+            embedding_seconds=args.embedding_latency,
+            weaviate_seconds=args.weaviate_latency,
+            mongodb_seconds=args.mongodb_latency,
+            jitter=args.jitter
+        )
+        self.stats = CallStats()
+
+        os.environ.update(BACKEND_ENV)
+        for key, value in DEFAULT_ENV.items():
+            os.environ.setdefault(key, value)
+        if args.workflow:
+            os.environ["AGENTIC_RAG_WORKFLOW_CONFIG_PATH"] = str(Path(args.workflow).resolve())
+        sys.path.insert(0, str(ROOT_DIR / "app"))
+
+        corpus = FakeCorpus(size=args.corpus_size)
+        weaviate_client = FakeWeaviateClient(corpus, self.latency, self.stats, sorted({q["weaviate_collection"] for q in queries}))
+        mongo_client = FakeMongoClient(corpus, self.latency, self.stats, sorted({q["mongodb_dbname"] for q in queries}))
+        mock.patch("weaviate.connect_to_local", lambda **kwargs: weaviate_client).start()
+        mock.patch("pymongo.MongoClient", lambda *args, **kwargs: mongo_client).start()
+
+        import main
+        import ai
+        from utils.token_counter import get_token_counter
+        from configs.env_configs import env_config
+        from workflows import get_agentic_rag_graph
+        from utils.metrics import node_duration_seconds
+        from workflows.graph import WorkflowGraphBuilder
+        from workflows.states import AgenticRAGState, AgenticRAGContextSchema
+        from workflows.configs.agentic_rag import AGENTIC_RAG_WORKFLOW
+
+        # The app configures the root logger (file + stderr); httpx logs every fake call through it
+        logging.getLogger().setLevel(args.log_level)
+
+        server = FakeOpenAIServer(self.latency, self.stats, get_token_counter(env_config.context_tokenizer_encoding))
+        ai.llm.http_async_client = httpx.AsyncClient(transport=server.transport())
+        ai.embedding_model.async_client = httpx.AsyncClient(transport=server.transport())
+
+        self.node_histogram = node_duration_seconds
+        graph = WorkflowGraphBuilder(
+            state_schema=AgenticRAGState,
+            context_schema=AgenticRAGContextSchema,
+            workflow_config=AGENTIC_RAG_WORKFLOW,
+            instrument=True,
+            name=BENCHMARK_WORKFLOW
+        ).build()
+
+        self.app = main.app
+        self.app.dependency_overrides[get_agentic_rag_graph] = lambda: graph
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://api.benchmark", timeout=None)
+
+    async def send(self, client : httpx.AsyncClient, query : Dict[str, Any]) -> httpx.Response:
+        return await client.post("/api/v1/query", json=query)
+
+    async def run_level(self, concurrency : int) -> Dict[str, Any]:
+        workload = [query for _ in range(self.args.repeat) for query in self.queries]
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies : List[float] = []
+        errors : Dict[str, int] = defaultdict(int)
+
+        async with self.client() as client:
+            for _ in range(self.args.warmup):
+                await asyncio.gather(*(self.send(client, query) for query in self.queries))
+            self.stats.reset()
+            nodes_before = self.node_histogram.snapshot()
+
+            async def one(query : Dict[str, Any]) -> None:
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await self.send(client, query)
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        errors[str(response.status_code)] += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(query) for query in workload))
+            elapsed = time.perf_counter() - start
+
+        nodes = node_durations(nodes_before, self.node_histogram.snapshot(), BENCHMARK_WORKFLOW)
+        backend = self.stats.reset()
+        return {
+            "concurrency": concurrency,
+            "requests": len(workload),
+            "errors": dict(errors),
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(workload) / elapsed, 3) if elapsed else 0.0,
+            "latency": summarize_seconds(latencies),
+            "nodes": {name: summarize_histogram(self.node_histogram.buckets, counts, total) for name, (counts, total) in nodes.items()},
+            "backend": backend,
+            "tokens_per_request": {
+                "prompt": round(backend.get("prompt_tokens", 0) / len(workload), 1),
+                "completion": round(backend.get("completion_tokens", 0) / len(workload), 1),
+            },
+        }
+
+    async def run_memory(self) -> Dict[str, Any]:
+        """One sequential pass under tracemalloc: peak and retained bytes per request, plus the top allocation sites."""
+        peaks : List[float] = []
+        async with self.client() as client:
+            tracemalloc.start(10)
+            before = tracemalloc.take_snapshot()
+            for query in self.queries:
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                await self.send(client, query)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - baseline)
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        differences = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        retained = sum(difference.size_diff for difference in differences)
+        return {
+            "requests": len(self.queries),
+            "peak_kib_p50": round(percentile(peaks, 50) / 1024, 1),
+            "peak_kib_max": round(max(peaks) / 1024, 1),
+            "retained_kib_per_request": round(retained / len(self.queries) / 1024, 1),
+            "top_retained": [
+                {"site": str(difference.traceback[0]), "kib": round(difference.size_diff / 1024, 1), "blocks": difference.count_diff}
+                for difference in differences[:5]
+            ],
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        report = {
+            "queries": len(self.queries),
+            "repeat": self.args.repeat,
+            "workflow": os.environ["AGENTIC_RAG_WORKFLOW_CONFIG_PATH"],
+            "latency_profile": vars(self.latency),
+            "levels": [await self.run_level(concurrency) for concurrency in self.args.concurrency],
+        }
+        if not self.args.no_memory:
+            report["memory"] = await self.run_memory()
+        return report
+
+def compare(report : Dict[str, Any], baseline : Dict[str, Any], max_regression : float) -> List[str]:
+    """Regressions of `report` against `baseline`, per concurrency level present in both."""
+    regressions = []
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        previous = baseline_levels.get(level["concurrency"])
+        if previous is None:
+            continue
+
+        checks = [
+            ("p95 latency", level["latency"]["p95_ms"], previous["latency"]["p95_ms"], True),
+            ("p99 latency", level["latency"]["p99_ms"], previous["latency"]["p99_ms"], True),
+            ("throughput", level["throughput_rps"], previous["throughput_rps"], False),
+            ("prompt tokens/request", level["tokens_per_request"]["prompt"], previous["tokens_per_request"]["prompt"], True),
+        ]
+        for name, current, before, lower_is_better in checks:
+            if not before:
+                continue
+            change = (current - before) / before if lower_is_better else (before - current) / before
+            if change > max_regression:
+                regressions.append(f"concurrency {level['concurrency']}: {name} {before} -> {current} ({(current - before) / before:+.0%})")
+    return regressions
+
+def print_summary(report : Dict[str, Any]) -> None:
+    print(f"\n{report['queries']} queries x {report['repeat']} | workflow {report['workflow']}")
+    print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'llm':>6} {'prompt tok/req':>15}")
+    for level in report["levels"]:
+        print(
+            f"{level['concurrency']:>11} {level['throughput_rps']:>9} {level['latency']['p50_ms']:>9} {level['latency']['p95_ms']:>9} "
+            f"{level['latency']['p99_ms']:>9} {sum(level['errors'].values()):>7} {level['backend'].get('llm_calls', 0):>6} "
+            f"{level['tokens_per_request']['prompt']:>15}"
+        )
+
+    last = report["levels"][-1]
+    print(f"\nPer node at concurrency {last['concurrency']}:")
+    print(f"{'node':>50} {'calls':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, timing in last["nodes"].items():
+        print(f"{name:>50} {timing['count']:>6} {timing['mean_ms']:>9} {timing['p50_ms']:>9} {timing['p95_ms']:>9} {timing['p99_ms']:>9}")
+
+    if "memory" in report:
+        memory = report["memory"]
+        print(f"\nMemory: peak {memory['peak_kib_p50']} KiB/request (p50), {memory['peak_kib_max']} KiB max, retained {memory['retained_kib_per_request']} KiB/request")
+
+def parse_args(argv : Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay /api/v1/query bodies against the app with fake backends.")
+    parser.add_argument("--queries", default=str(BENCHMARK_DIR / "queries.jsonl"), help="JSONL file, one /api/v1/query body per line")
+    parser.add_argument("--workflow", default=None, help="Agentic RAG workflow YAML (default: benchmarks/workflows/agentic_rag.yaml)")
+    parser.add_argument("--concurrency", default="1,4,16", type=lambda value: [int(item) for item in value.split(",")], help="Comma-separated concurrency levels")
+    parser.add_argument("--repeat", default=3, type=int, help="Passes over the queries per concurrency level")
+    parser.add_argument("--warmup", default=1, type=int, help="Unmeasured passes before each level (fills catalogs and caches)")
+    parser.add_argument("--corpus-size", default=500, type=int, help="Chunks in the fake corpus")
+    parser.add_argument("--llm-latency", default=0.05, type=float, help="Seconds per LLM call")
+    parser.add_argument("--llm-latency-per-token", default=0.0, type=float, help="Extra seconds per completion token")
+    parser.add_argument("--embedding-latency", default=0.01, type=float, help="Seconds per embedding request")
+    parser.add_argument("--weaviate-latency", default=0.01, type=float, help="Seconds per hybrid query")
+    parser.add_argument("--mongodb-latency", default=0.01, type=float, help="Seconds per full-text search")
+    parser.add_argument("--jitter", default=0.2, type=float, help="Deterministic +/- latency fraction")
+    parser.add_argument("--log-level", default="WARNING", help="App log level; INFO includes the production logging cost")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against")
+    parser.add_argument("--max-regression", default=0.2, type=float, help="Allowed relative regression before failing")
+    return parser.parse_args(argv)
+
+def main(argv : Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    benchmark = Benchmark(args, load_queries(Path(args.queries)))
+    report = asyncio.run(benchmark.run())
+
+    print_summary(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if sum(sum(level["errors"].values()) for level in report["levels"]):
+        print("\nSome requests failed, see the errors column")
+        return 1
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"\nNo regression above {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())